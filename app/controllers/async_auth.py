@@ -0,0 +1,57 @@
+import time
+from fastapi import Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.db import get_async_db
+from app.models.models import User
+from app.controllers.auth import (
+    oauth2_scheme, verify_and_update_password, decode_token, credentials_error,
+    get_cached_token_user, cache_token_user
+)
+from app.controllers.password_hasher import password_hasher
+
+# Async counterparts of app.controllers.auth for the async routes
+
+async def get_user_by_username(db: AsyncSession, username: str):
+    """Get user from database by username"""
+    return await db.scalar(select(User).where(User.username == username))
+
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    """Authenticate user with username and password"""
+    started = time.perf_counter()
+    try:
+        user = await get_user_by_username(db, username)
+        if not user:
+            return False
+        # bcrypt is CPU-bound by design; it runs on the bounded hash pool
+        verified, new_hash = await password_hasher.run_async(
+            verify_and_update_password, password, user.hashed_password
+        )
+        if not verified:
+            return False
+        if new_hash is not None:
+            user.hashed_password = new_hash
+            await db.commit()
+        return user
+    finally:
+        password_hasher.login_latency.observe(time.perf_counter() - started)
+
+async def get_current_user(db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)):
+    """Get current user from JWT token"""
+    user = get_cached_token_user(token)
+    if user is not None:
+        return user
+    
+    username, exp = decode_token(token)
+    user = await get_user_by_username(db, username=username)
+    if user is None:
+        raise credentials_error()
+    cache_token_user(token, user, exp)
+    return user
+
+async def get_current_active_user(current_user: User = Depends(get_current_user)):
+    """Check if current user is active"""
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
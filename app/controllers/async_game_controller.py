@@ -0,0 +1,250 @@
+from fastapi import HTTPException
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+
+from app.models.models import Game, Move, User, GameStatus, BotDifficulty
+from app.schemas.schemas import GameCreate, GameBoard
+from app.engine.bitboard import Bitboard, O
+from app.controllers.game_hub import game_hub
+from app.controllers.async_user_controller import get_or_create_user
+from app.controllers.stats_controller import record_game_result_async
+from app.controllers.leaderboard import record_ratings
+from app.controllers.move_store import store_for, new_move_log
+from app.database.archive import game_archive, is_archived
+from app.controllers.game_controller import (
+    validate_game_settings, validate_move, user_games_statement, encode_cursor, apply_move, publish_move, save_board,
+    archived_user_games, merge_archived, CONCURRENT_MOVE_DETAIL,
+    cache_board, lookup_board, invalidate_board, build_game_board
+)
+
+# Async counterparts of app.controllers.game_controller for the async routes.
+# The rules live in the sync module; only the database access differs.
+
+# Templates read game.player_x / game.player_o, and an AsyncSession cannot
+# lazy-load them, so every game query loads both players up front
+PLAYERS = (selectinload(Game.player_x), selectinload(Game.player_o))
+
+async def create_game(db: AsyncSession, game: GameCreate, current_user_id: int):
+    """Create a new game"""
+    validate_game_settings(game.board_size, game.win_length)
+    
+    db_game = Game(
+        player_x_id=current_user_id,
+        player_o_id=game.player_o_id,
+        status=GameStatus.IN_PROGRESS.value,
+        board_size=game.board_size,
+        win_length=game.win_length,
+        board=Bitboard(game.board_size, game.win_length).pack(),
+        move_log=new_move_log()
+    )
+    db.add(db_game)
+    await db.commit()
+    await db.refresh(db_game)
+    return db_game
+
+async def create_bot_game(
+    db: AsyncSession, current_user_id: int, board_size: int = 3, win_length: int = 3,
+    bot_difficulty: str = BotDifficulty.MEDIUM.value
+) -> Game:
+    """Create a new game against the bot"""
+    if bot_difficulty not in {level.value for level in BotDifficulty}:
+        raise HTTPException(status_code=400, detail="Unknown bot difficulty")
+    
+    bot_user = await get_or_create_user(db, "bot")
+    
+    # Create game with bot as player O
+    db_game = Game(
+        player_x_id=current_user_id,
+        player_o_id=bot_user.id,
+        status=GameStatus.IN_PROGRESS.value,
+        is_bot_game=True,
+        bot_difficulty=bot_difficulty,
+        board_size=board_size,
+        win_length=win_length,
+        board=Bitboard(board_size, win_length).pack(),
+        move_log=new_move_log()
+    )
+    db.add(db_game)
+    await db.commit()
+    await db.refresh(db_game)
+    return db_game
+
+async def get_game(db: AsyncSession, game_id: int) -> Game:
+    """Get game by ID, with both players loaded; from the archive if it was moved there"""
+    game = await db.get(Game, game_id, options=PLAYERS)
+    if game is None:
+        game = game_archive.game(game_id)
+        if game is None:
+            raise HTTPException(status_code=404, detail="Game not found")
+        await load_players(db, [game])
+    return game
+
+async def load_players(db: AsyncSession, games: List[Game]):
+    """Set player_x / player_o on archived games, which are not in the session"""
+    ids = {game.player_x_id for game in games} | {game.player_o_id for game in games}
+    users = {user.id: user for user in await db.scalars(select(User).where(User.id.in_(ids)))}
+    for game in games:
+        set_committed_value(game, "player_x", users.get(game.player_x_id))
+        set_committed_value(game, "player_o", users.get(game.player_o_id))
+
+async def get_user_games(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100) -> List[Game]:
+    """Get games where user is player X or player O"""
+    games, _ = await get_user_games_page(db, user_id, limit, skip=skip)
+    return games
+
+async def get_user_games_page(
+    db: AsyncSession, user_id: int, limit: int = 50, cursor: Optional[str] = None, skip: int = 0
+) -> Tuple[List[Game], Optional[str]]:
+    """One page of a user's games (players loaded) and the next page's cursor"""
+    archived = archived_user_games(user_id, limit + 1, cursor, skip)
+    db_skip, db_limit = (0, skip + limit + 1) if archived else (skip, limit + 1)
+    source, stmt = user_games_statement(user_id, db_limit, cursor, db_skip)
+    result = await db.scalars(stmt.options(selectinload(source.player_x), selectinload(source.player_o)))
+    games = result.all()
+    if archived:
+        games = merge_archived(games, archived, skip)
+        await load_players(db, [game for game in games if is_archived(game)])
+    next_cursor = encode_cursor(games[limit - 1]) if len(games) > limit else None
+    return games[:limit], next_cursor
+
+def open_games_statement(user_id: int):
+    """Lobby query; its filter matches the partial ix_games_open index"""
+    return select(Game).where(
+        Game.player_o_id.is_(None),
+        Game.player_x_id != user_id,
+        Game.status == GameStatus.IN_PROGRESS.value
+    ).order_by(Game.created_at.desc())
+
+async def get_open_games(db: AsyncSession, user_id: int) -> List[Game]:
+    """Games without player O that another user started"""
+    result = await db.scalars(open_games_statement(user_id).options(*PLAYERS))
+    return result.all()
+
+async def join_game(db: AsyncSession, game_id: int, user_id: int):
+    """Join an existing game as player O"""
+    game = await get_game(db, game_id)
+    
+    if game.player_o_id is not None:
+        raise HTTPException(status_code=400, detail="Game already has player O")
+    
+    if game.player_x_id == user_id:
+        raise HTTPException(status_code=400, detail="You cannot play against yourself")
+    
+    game.player_o_id = user_id
+    await db.commit()
+    invalidate_board(game_id)
+    game_hub.publish(game_id, {"type": "join", "player_o_id": user_id})
+    await db.refresh(game, attribute_names=["player_o", "updated_at"])
+    return game
+
+async def make_move(db: AsyncSession, game_id: int, user_id: int, row: int, col: int) -> Move:
+    """Make a move in the game"""
+    game = await get_game(db, game_id)
+    board = await get_bitboard(db, game)
+    current_player = validate_move(game, board, user_id, row, col)
+    new_move, game_status = apply_move(game, board, user_id, row, col, current_player)
+    store_for(game).add(db, game, new_move)
+    ratings = []
+    if game_status != GameStatus.IN_PROGRESS:
+        ratings = [(s.user_id, s.rating, s.games) for s in await record_game_result_async(db, game)]
+    
+    # The move, the game snapshot and the players' stats are committed together
+    await commit_move(db, game_id)
+    record_ratings(ratings)
+    publish_move(game_id, board, new_move, game_status)
+    return new_move
+
+async def make_move_with_bot_reply(
+    db: AsyncSession, game_id: int, user_id: int, row: int, col: int
+) -> Tuple[Move, Optional[Move]]:
+    """Make a move and, in a bot game, the bot's reply in the same transaction.
+
+    The bot picks its reply on the board the move just produced, and both
+    moves, the snapshot and any result go out in one commit. The reply is
+    None when the game is over or the bot needs its full search; the
+    caller then queues the reply on the background bot scheduler.
+    """
+    game = await get_game(db, game_id)
+    board = await get_bitboard(db, game)
+    current_player = validate_move(game, board, user_id, row, col)
+    new_move, game_status = apply_move(game, board, user_id, row, col, current_player)
+    store_for(game).add(db, game, new_move)
+    
+    published = [(new_move, board.copy(), game_status)]
+    reply = None
+    if game.is_bot_game and game_status == GameStatus.IN_PROGRESS and board.current_player == O:
+        from app.controllers.bot_controller import TicTacToeBot
+        bot = TicTacToeBot(None, game_id, game.player_o_id, game=game)
+        # Searches can take a good fraction of a second; keep the loop free
+        cell = await run_in_threadpool(bot.quick_move, board.copy())
+        if cell is not None:
+            validate_move(game, board, game.player_o_id, *cell)
+            reply, game_status = apply_move(game, board, game.player_o_id, *cell, O)
+            store_for(game).add(db, game, reply)
+            published.append((reply, board, game_status))
+    
+    ratings = []
+    if game_status != GameStatus.IN_PROGRESS:
+        ratings = [(s.user_id, s.rating, s.games) for s in await record_game_result_async(db, game)]
+    
+    await commit_move(db, game_id)
+    record_ratings(ratings)
+    for move, move_board, move_status in published:
+        publish_move(game_id, move_board, move, move_status)
+    return new_move, reply
+
+async def commit_move(db: AsyncSession, game_id: int):
+    """Commit a move; 409 if another move on the game was committed first"""
+    try:
+        await db.commit()
+    except (StaleDataError, IntegrityError):
+        await db.rollback()
+        invalidate_board(game_id)
+        raise HTTPException(status_code=409, detail=CONCURRENT_MOVE_DETAIL)
+
+async def delete_game(db: AsyncSession, game: Game):
+    """Delete a game and its moves"""
+    if is_archived(game):
+        raise HTTPException(status_code=400, detail="Archived games cannot be deleted")
+    await db.execute(delete(Move).where(Move.game_id == game.id))
+    await db.delete(game)
+    await db.commit()
+    invalidate_board(game.id)
+
+async def get_bitboard(db: AsyncSession, game: Game) -> Bitboard:
+    """Get the engine board for a game from its stored snapshot"""
+    if game.board is not None:
+        return Bitboard.unpack(game.board_size, game.win_length, game.board)
+    
+    # Games created before snapshots existed are replayed once and backfilled;
+    # the store reads through the sync session behind this one
+    cells = await db.run_sync(lambda session: store_for(game).cells(session, game))
+    board = Bitboard.from_moves(game.board_size, game.win_length, cells)
+    save_board(game, board)
+    return board
+
+async def get_cached_board(db: AsyncSession, game_id: int, game: Optional[Game] = None) -> Tuple[Bitboard, str]:
+    """Get the engine board and status for a game, via the board cache.
+
+    Pass the game if it was just loaded: the cache entry is checked against it.
+    """
+    cached = lookup_board(game_id, game)
+    if cached is not None:
+        return cached
+    
+    if game is None:
+        game = await get_game(db, game_id)
+    board = await get_bitboard(db, game)
+    cache_board(game_id, board, game.status)
+    return board, game.status
+
+async def get_game_with_board(db: AsyncSession, game_id: int, game: Optional[Game] = None) -> GameBoard:
+    """Get game with current board state"""
+    board, game_status = await get_cached_board(db, game_id, game)
+    return build_game_board(board, game_status)
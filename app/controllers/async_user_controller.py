@@ -0,0 +1,87 @@
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import User
+from app.schemas.schemas import UserCreate
+from app.controllers.auth import get_password_hash, invalidate_user_tokens
+from app.controllers.password_hasher import password_hasher
+from app.controllers.async_auth import get_user_by_username
+
+# Async counterparts of app.controllers.user_controller for the async routes
+
+async def create_user(db: AsyncSession, user: UserCreate):
+    """
+    Create a new user
+    """
+    # Check if username already exists
+    existing_user = await get_user_by_username(db, username=user.username)
+    if existing_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already registered"
+        )
+    
+    # Check if email already exists
+    db_user_email = await db.scalar(select(User).where(User.email == user.email))
+    if db_user_email:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    
+    # Create new user; bcrypt runs on the bounded hash pool
+    hashed_password = await password_hasher.run_async(get_password_hash, user.password)
+    db_user = User(
+        username=user.username,
+        email=user.email,
+        hashed_password=hashed_password
+    )
+    
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def get_user(db: AsyncSession, user_id: int):
+    """
+    Get user by ID
+    """
+    user = await db.get(User, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100):
+    """
+    Get all users with pagination
+    """
+    result = await db.scalars(select(User).offset(skip).limit(limit))
+    return result.all()
+
+async def get_or_create_user(db: AsyncSession, username: str) -> User:
+    """Get or create a special user (bot, player1, player2)"""
+    special_user = await get_user_by_username(db, username)
+    if not special_user:
+        special_user = User(
+            username=username,
+            email=f"{username}@example.com",
+            hashed_password="not_used",
+            is_active=True,
+            is_bot=username == "bot"  # только бот имеет флаг is_bot=True
+        )
+        db.add(special_user)
+        await db.commit()
+        await db.refresh(special_user)
+    return special_user
+
+async def update_user_active_status(db: AsyncSession, user_id: int, is_active: bool):
+    """
+    Activate or deactivate a user
+    """
+    user = await get_user(db, user_id)
+    user.is_active = is_active
+    await db.commit()
+    invalidate_user_tokens(user_id)
+    await db.refresh(user)
+    return user
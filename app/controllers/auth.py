@@ -1,16 +1,18 @@
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 import os
+import time
 from dotenv import load_dotenv
 
 from app.database.db import get_db
 from app.models.models import User
 from app.schemas.schemas import TokenData
+from app.controllers.password_hasher import password_hasher
+from app.cache.lru import LRUCache
 
 # Load environment variables
 load_dotenv()
@@ -20,19 +22,62 @@ SECRET_KEY = os.getenv("SECRET_KEY", "09d25e094faa6ca2556c818166b7a9563b93f7099f
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Comma-separated usernames with admin rights (e.g. exporting every game)
+ADMIN_USERNAMES = frozenset(name.strip() for name in os.getenv("ADMIN_USERNAMES", "").split(",") if name.strip())
+
+# bcrypt cost factor; stored hashes with another cost are rehashed on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Password hashing. passlib, like jose (and cryptography, which it pulls
+# in), is imported on first use rather than when a worker starts
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """The bcrypt CryptContext, created on first use"""
+    from passlib.context import CryptContext
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=BCRYPT_ROUNDS,
+        bcrypt__min_rounds=BCRYPT_ROUNDS,
+        bcrypt__max_rounds=BCRYPT_ROUNDS
+    )
 
 # OAuth2 scheme for token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Users resolved per token. An entry never outlives its token's exp.
+# (De)activation clears the entries of this process at once; other worker
+# processes keep accepting a deactivated user's token for up to the TTL,
+# so keep it short
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "5"))
+
+class CachedUser(NamedTuple):
+    id: int
+    username: str
+    email: str
+    is_active: bool
+    is_bot: bool
+    created_at: Optional[datetime]
+
+token_cache = LRUCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
 def verify_password(plain_password, hashed_password):
     """Verify password against hashed password"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """Verify a password; on success also return a new hash if the stored
+    one does not use the configured cost"""
+    try:
+        return get_pwd_context().verify_and_update(plain_password, hashed_password)
+    except ValueError:
+        # Placeholder hashes of the bot and special users never match
+        return False, None
 
 def get_password_hash(password):
     """Generate password hash"""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def get_user_by_username(db: Session, username: str):
     """Get user from database by username"""
@@ -40,12 +85,20 @@ def get_user_by_username(db: Session, username: str):
 
 def authenticate_user(db: Session, username: str, password: str):
     """Authenticate user with username and password"""
-    user = get_user_by_username(db, username)
-    if not user:
-        return False
-    if not verify_password(password, user.hashed_password):
-        return False
-    return user
+    started = time.perf_counter()
+    try:
+        user = get_user_by_username(db, username)
+        if not user:
+            return False
+        verified, new_hash = password_hasher.run(verify_and_update_password, password, user.hashed_password)
+        if not verified:
+            return False
+        if new_hash is not None:
+            user.hashed_password = new_hash
+            db.commit()
+        return user
+    finally:
+        password_hasher.login_latency.observe(time.perf_counter() - started)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
@@ -55,16 +108,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    from jose import jwt
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    """Get current user from JWT token"""
-    credentials_exception = HTTPException(
+def credentials_error() -> HTTPException:
+    """401 raised for a missing, invalid or unknown-user token"""
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def decode_token(token: str) -> Tuple[str, Optional[float]]:
+    """Username (sub claim) and exp timestamp of a valid JWT; raises 401 otherwise"""
+    from jose import JWTError, jwt
+    credentials_exception = credentials_error()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -73,14 +132,54 @@ async def get_current_user(db: Session = Depends(get_db), token: str = Depends(o
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
+    return token_data.username, payload.get("exp")
+
+def get_cached_token_user(token: str) -> Optional[User]:
+    """User resolved earlier for this exact token, as a detached copy"""
+    if not token:
+        return None
+    entry = token_cache.get(token)
+    if entry is None:
+        return None
+    return User(**entry._asdict())
+
+def cache_token_user(token: str, user: User, exp: Optional[float]):
+    """Remember the user a verified token resolved to, until exp at the latest"""
+    ttl = TOKEN_CACHE_TTL
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+    if ttl <= 0:
+        return
+    token_cache.set(token, CachedUser(
+        user.id, user.username, user.email, bool(user.is_active), bool(user.is_bot), user.created_at
+    ), ttl=ttl)
+
+def invalidate_user_tokens(user_id: int):
+    """Drop every cached token of a user in this process, e.g. after
+    (de)activation; other processes drop theirs within TOKEN_CACHE_TTL"""
+    token_cache.pop_where(lambda entry: entry.id == user_id)
+
+# A plain def: FastAPI runs it in the threadpool, so the sync query does
+# not block the event loop (async routes use async_auth instead)
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    """Get current user from JWT token"""
+    user = get_cached_token_user(token)
+    if user is not None:
+        return user
     
-    user = get_user_by_username(db, username=token_data.username)
+    username, exp = decode_token(token)
+    user = get_user_by_username(db, username=username)
     if user is None:
-        raise credentials_exception
+        raise credentials_error()
+    cache_token_user(token, user, exp)
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     """Check if current user is active"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user 
\ No newline at end of file
+    return current_user
+
+def is_admin(user) -> bool:
+    """Whether a user is listed in ADMIN_USERNAMES"""
+    return user.username in ADMIN_USERNAMES
@@ -1,127 +1,151 @@
-from typing import List, Optional, Tuple
+from typing import Optional, Tuple
 import random
+import os
 from sqlalchemy.orm import Session
-from app.models.models import Game, Move, User, GameStatus
-from app.controllers.game_controller import get_board_state, make_move, get_game
+from app.models.models import Game, Move, User, GameStatus, BotDifficulty
+from app.controllers.game_controller import get_bitboard, make_move, get_game
+from app.engine.bitboard import Bitboard, X, O
+from app.engine.search import AlphaBetaSearch
+from app.engine.mcts import MCTSSearch
+from app.engine.solved import solved_move
+
+# Hard wall-clock limit for one bot move, in seconds
+BOT_TIME_BUDGET = float(os.getenv("BOT_TIME_BUDGET", "1.0"))
+
+# (max depth, time budget) per difficulty; "easy" uses the one-ply heuristics
+# and "expert" runs parallel MCTS for the whole budget
+SEARCH_SETTINGS = {
+    BotDifficulty.MEDIUM.value: (2, min(0.25, BOT_TIME_BUDGET)),
+    BotDifficulty.HARD.value: (64, BOT_TIME_BUDGET),
+}
+
+# Difficulties that use the perfect-play tables when one covers the board
+PERFECT_PLAY_DIFFICULTIES = {BotDifficulty.HARD.value, BotDifficulty.EXPERT.value}
 
 class TicTacToeBot:
-    def __init__(self, db: Session, game_id: int, bot_user_id: int):
+    def __init__(self, db: Optional[Session], game_id: int, bot_user_id: int, game: Optional[Game] = None):
         self.db = db
         self.game_id = game_id
         self.bot_user_id = bot_user_id
-        self.game = get_game(db, game_id)
+        # Callers that already hold the game pass it in instead of a reload
+        self.game = game if game is not None else get_game(db, game_id)
         self.board_size = self.game.board_size
         self.win_length = self.game.win_length
 
     def make_move(self) -> Optional[Move]:
-        """Make a bot move using a simple strategy"""
+        """Make a bot move using the game's difficulty setting"""
         try:
             print(f"Bot is making a move for game {self.game_id}")
-            board, move_count = get_board_state(self.db, self.game_id)
+            board = get_bitboard(self.db, self.game)
             
             # Check if it's bot's turn (should be "O")
-            current_player = "X" if move_count % 2 == 0 else "O"
-            if current_player != "O":
+            current_player = board.current_player
+            if current_player != O:
                 print(f"Not bot's turn. Current player: {current_player}")
                 return None
             
-            # Get available spaces first
-            available_moves = []
-            for row in range(self.board_size):
-                for col in range(self.board_size):
-                    if board[row][col] is None:
-                        available_moves.append((row, col))
-            
-            if not available_moves:
+            move = self.choose_move(board)
+            if move is None:
                 print("No available moves for bot")
                 return None
-            
-            # Try to win
-            move = self._find_winning_move(board, "O")
-            if move and board[move[0]][move[1]] is None:
-                print(f"Bot found winning move at {move[0]}, {move[1]}")
-                return self._execute_move(move[0], move[1])
-            
-            # Block opponent's winning move
-            move = self._find_winning_move(board, "X")
-            if move and board[move[0]][move[1]] is None:
-                print(f"Bot blocks opponent at {move[0]}, {move[1]}")
-                return self._execute_move(move[0], move[1])
-            
-            # Take center if available (for odd-sized boards)
-            if self.board_size % 2 == 1:
-                center = self.board_size // 2
-                if board[center][center] is None:
-                    print(f"Bot takes center at {center}, {center}")
-                    return self._execute_move(center, center)
-            
-            # Take corners
-            corners = [
-                (0, 0), 
-                (0, self.board_size - 1), 
-                (self.board_size - 1, 0), 
-                (self.board_size - 1, self.board_size - 1)
-            ]
-            random.shuffle(corners)
-            for row, col in corners:
-                if board[row][col] is None:
-                    print(f"Bot takes corner at {row}, {col}")
-                    return self._execute_move(row, col)
-            
-            # Take any available space
-            if available_moves:
-                row, col = random.choice(available_moves)
-                print(f"Bot takes random space at {row}, {col}")
-                return self._execute_move(row, col)
-            
-            print("No available moves for bot")
-            return None
+            return self._execute_move(move[0], move[1])
         except Exception as e:
             print(f"Bot error: {str(e)}")
             return None
 
-    def _find_winning_move(self, board: List[List[Optional[str]]], symbol: str) -> Optional[Tuple[int, int]]:
-        """Find a winning move for the given symbol"""
-        size = self.board_size
-        win_length = self.win_length
+    def quick_move(self, board: Bitboard) -> Optional[Tuple[int, int]]:
+        """A reply cheap enough to pick inside the player's request.
+
+        Easy and medium bots always have one; hard and expert bots only
+        where a perfect-play table covers the board. None means the full
+        search is needed, which is left to the background bot queue.
+        """
+        if self.difficulty in PERFECT_PLAY_DIFFICULTIES:
+            return solved_move(board)
+        return self.choose_move(board)
+
+    @property
+    def difficulty(self) -> str:
+        # Games without a difficulty predate the levels and keep the
+        # heuristic bot they were started with
+        return self.game.bot_difficulty or BotDifficulty.EASY.value
+
+    def choose_move(self, board: Bitboard) -> Optional[Tuple[int, int]]:
+        """Pick a cell for the side to move"""
+        difficulty = self.difficulty
+        if difficulty in PERFECT_PLAY_DIFFICULTIES:
+            # Small boards are looked up in the prebuilt perfect-play table
+            move = solved_move(board)
+            if move is not None:
+                print(f"Bot plays solved move {move}")
+                return move
+        
+        if difficulty == BotDifficulty.EXPERT.value:
+            search = MCTSSearch(board, time_limit=BOT_TIME_BUDGET)
+            move = search.best_move()
+            print(f"Bot MCTS picked {move}: {search.playouts} playouts")
+            return move
+        
+        settings = SEARCH_SETTINGS.get(difficulty)
+        if settings is None:
+            return self._heuristic_move(board)
+        
+        max_depth, time_budget = settings
+        search = AlphaBetaSearch(board, time_budget=time_budget, max_depth=max_depth)
+        move = search.best_move()
+        print(f"Bot search ({difficulty}) picked {move}: depth {search.depth_reached}, {search.nodes} nodes")
+        return move
+
+    def _heuristic_move(self, board: Bitboard) -> Optional[Tuple[int, int]]:
+        """One-ply strategy: win, block, center, corner, random"""
+        # Get available spaces first
+        available_moves = list(board.empty_cells())
+        if not available_moves:
+            return None
         
-        # Check rows
-        for row in range(size):
-            for col in range(size - win_length + 1):
-                window = board[row][col:col + win_length]
-                if self._is_potential_win(window, symbol):
-                    empty_index = next(i for i, val in enumerate(window) if val is None)
-                    return (row, col + empty_index)
+        # Try to win
+        move = self._find_winning_move(board, O)
+        if move:
+            print(f"Bot found winning move at {move[0]}, {move[1]}")
+            return move
         
-        # Check columns
-        for col in range(size):
-            for row in range(size - win_length + 1):
-                window = [board[row + i][col] for i in range(win_length)]
-                if self._is_potential_win(window, symbol):
-                    empty_index = next(i for i, val in enumerate(window) if val is None)
-                    return (row + empty_index, col)
+        # Block opponent's winning move
+        move = self._find_winning_move(board, X)
+        if move:
+            print(f"Bot blocks opponent at {move[0]}, {move[1]}")
+            return move
         
-        # Check diagonals (top-left to bottom-right)
-        for row in range(size - win_length + 1):
-            for col in range(size - win_length + 1):
-                window = [board[row + i][col + i] for i in range(win_length)]
-                if self._is_potential_win(window, symbol):
-                    empty_index = next(i for i, val in enumerate(window) if val is None)
-                    return (row + empty_index, col + empty_index)
+        # Take center if available (for odd-sized boards)
+        if self.board_size % 2 == 1:
+            center = self.board_size // 2
+            if board.is_legal(center, center):
+                print(f"Bot takes center at {center}, {center}")
+                return (center, center)
         
-        # Check diagonals (top-right to bottom-left)
-        for row in range(size - win_length + 1):
-            for col in range(win_length - 1, size):
-                window = [board[row + i][col - i] for i in range(win_length)]
-                if self._is_potential_win(window, symbol):
-                    empty_index = next(i for i, val in enumerate(window) if val is None)
-                    return (row + empty_index, col - empty_index)
+        # Take corners
+        corners = [
+            (0, 0), 
+            (0, self.board_size - 1), 
+            (self.board_size - 1, 0), 
+            (self.board_size - 1, self.board_size - 1)
+        ]
+        random.shuffle(corners)
+        for row, col in corners:
+            if board.is_legal(row, col):
+                print(f"Bot takes corner at {row}, {col}")
+                return (row, col)
         
+        # Take any available space
+        row, col = random.choice(available_moves)
+        print(f"Bot takes random space at {row}, {col}")
+        return (row, col)
+
+    def _find_winning_move(self, board: Bitboard, symbol: str) -> Optional[Tuple[int, int]]:
+        """Find an empty cell that completes a line for the given symbol"""
+        for row, col in board.empty_cells():
+            if board.wins_with(row, col, symbol):
+                return (row, col)
         return None
-    
-    def _is_potential_win(self, window: List[Optional[str]], symbol: str) -> bool:
-        """Check if a window has potential for a win (one empty space and rest are symbol)"""
-        return window.count(symbol) == len(window) - 1 and window.count(None) == 1
 
     def _execute_move(self, row: int, col: int) -> Move:
         """Execute the move through the game controller"""
@@ -0,0 +1,183 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from app.database.db import SessionLocal
+from app.models.models import Game, GameStatus
+from app.controllers.game_controller import get_bitboard, handle_bot_move
+from app.engine.bitboard import O
+
+# Concurrent bot moves per worker process
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", "2"))
+# Extra attempts for a job whose bot move failed
+BOT_JOB_RETRIES = int(os.getenv("BOT_JOB_RETRIES", "1"))
+# Seconds a bot game may wait on the bot, with no job for it in this
+# process, before opening the game schedules one again
+BOT_STALL_SECONDS = float(os.getenv("BOT_STALL_SECONDS", "10"))
+
+
+@dataclass
+class BotJob:
+    game_id: int
+    # Moves on the board when the job was scheduled; a different count at
+    # run time means the job is stale
+    move_count: int
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+
+class BotMoveScheduler:
+    """Runs bot replies in the background instead of inside the request.
+
+    Jobs are deduplicated per game: scheduling a game that already has a
+    pending job replaces that job. Workers run the bot in the default
+    thread pool with their own DB session, and the bot commits its own
+    move. Jobs whose game moved on in the meantime are dropped as stale;
+    a failed job is retried BOT_JOB_RETRIES times. Jobs live in memory
+    only, so games whose job was lost (failed for good, or its worker
+    process restarted) are picked up again by resume().
+    """
+
+    def __init__(self, workers: int = BOT_WORKERS):
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._loop = None
+        self._pending: Dict[int, BotJob] = {}
+        # Games whose job is being run right now
+        self._running: set = set()
+        self.processed = 0
+        self.deduplicated = 0
+        self.stale = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.retried = 0
+        self.resumed = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_last = 0.0
+
+    def start(self):
+        """Start the workers on the running event loop (idempotent)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._pending.clear()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    def schedule(self, game_id: int, move_count: int, attempts: int = 0):
+        """Queue a bot reply for a game whose board has move_count moves"""
+        self.start()
+        job = BotJob(game_id=game_id, move_count=move_count, attempts=attempts)
+        if game_id in self._pending:
+            self._pending[game_id] = job
+            self.deduplicated += 1
+            return
+        self._pending[game_id] = job
+        self._queue.put_nowait(game_id)
+
+    def resume(self, game: Game) -> bool:
+        """Schedule the reply of a bot game stuck with the bot to move.
+
+        Called when a page or socket opens the game. Games with a job queued
+        or running here, or that moved within BOT_STALL_SECONDS (another
+        worker may still be on it), are left alone. Returns whether a job
+        was scheduled.
+        """
+        if not game.is_bot_game or game.status != GameStatus.IN_PROGRESS.value or game.current_player != O:
+            return False
+        if game.id in self._pending or game.id in self._running:
+            return False
+        if game.updated_at is not None and datetime.utcnow() - game.updated_at < timedelta(seconds=BOT_STALL_SECONDS):
+            return False
+        self.schedule(game.id, game.move_count or 0)
+        self.resumed += 1
+        return True
+
+    def cancel(self, game_id: int):
+        """Drop a pending job, e.g. when its game is deleted"""
+        if self._pending.pop(game_id, None) is not None:
+            self.cancelled += 1
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            game_id = await self._queue.get()
+            try:
+                job = self._pending.pop(game_id, None)
+                if job is None:
+                    continue
+                self._running.add(game_id)
+                try:
+                    result = await loop.run_in_executor(None, _run_job, job)
+                except Exception as e:
+                    print(f"Bot job error for game {game_id}: {str(e)}")
+                    result = "failed"
+                finally:
+                    self._running.discard(game_id)
+                if result == "stale":
+                    self.stale += 1
+                elif result == "failed":
+                    self.failed += 1
+                    # A newer job for the game supersedes the retry
+                    if job.attempts < BOT_JOB_RETRIES and game_id not in self._pending:
+                        self.retried += 1
+                        self.schedule(game_id, job.move_count, attempts=job.attempts + 1)
+                else:
+                    latency = time.monotonic() - job.enqueued_at
+                    self.processed += 1
+                    self.latency_total += latency
+                    self.latency_max = max(self.latency_max, latency)
+                    self.latency_last = latency
+            except Exception as e:
+                self.failed += 1
+                print(f"Bot job error for game {game_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "pending": len(self._pending),
+            "processed": self.processed,
+            "deduplicated": self.deduplicated,
+            "stale": self.stale,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "retried": self.retried,
+            "resumed": self.resumed,
+            "latency_avg": self.latency_total / self.processed if self.processed else 0.0,
+            "latency_max": self.latency_max,
+            "latency_last": self.latency_last,
+        }
+
+
+def _run_job(job: BotJob) -> str:
+    """Make the bot move for a job in a fresh session (runs in a thread)"""
+    db = SessionLocal()
+    try:
+        game = db.get(Game, job.game_id)
+        if game is None or not game.is_bot_game or game.status != GameStatus.IN_PROGRESS.value:
+            return "stale"
+        if get_bitboard(db, game).move_count != job.move_count:
+            return "stale"
+        move = handle_bot_move(db, job.game_id, game)
+        return "done" if move is not None else "failed"
+    finally:
+        db.close()
+
+
+bot_scheduler = BotMoveScheduler()
@@ -0,0 +1,202 @@
+"""Streaming export of games and their moves as NDJSON or CSV.
+
+One record per game; its moves are in the compact notation that
+POST /api/games/import reads ("b2 a1 c3"), so an export can be imported
+elsewhere as is. Games are read in keyset batches of EXPORT_BATCH_SIZE by
+id, with one moves query per batch, and merged by id with the matching
+archived games; every batch is written out before the next is read, so
+memory stays flat however many games match.
+
+Run by hand with ``python -m app.controllers.export_controller --help``.
+"""
+import argparse
+import csv
+import heapq
+import io
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from itertools import groupby, islice
+from typing import Iterator, List, NamedTuple, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import or_, select
+
+from app.database.db import SessionLocal
+from app.database.archive import game_archive
+from app.models.models import Game, Move, GameStatus
+from app.controllers.import_controller import format_moves
+from app.engine.move_log import decode
+
+# Games read (and written out) per batch
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+EXPORT_COLUMNS = (
+    "id", "player_x_id", "player_o_id", "status", "winner_id", "is_bot_game",
+    "board_size", "win_length", "created_at", "updated_at", "moves",
+)
+
+class ExportFilters(NamedTuple):
+    """Which games to export; None matches any game"""
+    user_id: Optional[int] = None
+    status: Optional[str] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+    def clauses(self) -> list:
+        """WHERE clauses for the games table"""
+        clauses = []
+        if self.user_id is not None:
+            clauses.append(or_(Game.player_x_id == self.user_id, Game.player_o_id == self.user_id))
+        if self.status is not None:
+            clauses.append(Game.status == self.status)
+        if self.since is not None:
+            clauses.append(Game.created_at >= self.since)
+        if self.until is not None:
+            clauses.append(Game.created_at < self.until)
+        return clauses
+
+    def matches(self, game) -> bool:
+        """Whether an archived game passes the filters"""
+        return (
+            (self.user_id is None or self.user_id in (game.player_x_id, game.player_o_id))
+            and (self.status is None or game.status == self.status)
+            and (self.since is None or game.created_at >= self.since)
+            and (self.until is None or game.created_at < self.until)
+        )
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    # Stored times are naive UTC
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def export_filters(
+    user_id: Optional[int] = None, status: Optional[str] = None,
+    since: Optional[datetime] = None, until: Optional[datetime] = None
+) -> ExportFilters:
+    """Filters for the export; 400 on an unknown status"""
+    if status is not None and status not in {value.value for value in GameStatus}:
+        raise HTTPException(status_code=400, detail="Unknown game status")
+    return ExportFilters(user_id, status, _utc(since), _utc(until))
+
+def _log_moves(log: bytes, board_size: int) -> str:
+    return format_moves(divmod(cell, board_size) for cell, _ in decode(log))
+
+def iter_archived_games(filters: ExportFilters) -> Iterator[dict]:
+    """Matching archived games with their moves, in id order"""
+    def segment_games(segment):
+        # Rows of a segment are in id order
+        rows = sorted(segment.player_rows(filters.user_id)) if filters.user_id is not None else range(segment.count)
+        for row in rows:
+            game = segment.game(row)
+            if filters.matches(game):
+                yield {name: getattr(game, name) for name in EXPORT_COLUMNS if name != "moves"} | {
+                    "moves": _log_moves(game.move_log, game.board_size)
+                }
+    return heapq.merge(*(segment_games(segment) for segment in game_archive.segments()), key=lambda game: game["id"])
+
+def iter_database_batches(filters: ExportFilters, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[dict]]:
+    """Matching games of the games table with their moves, batch by batch, in id order.
+
+    Uses its own session, so a streaming response can outlive the request's.
+    Each batch is a fresh keyset query (id > last id): no cursor stays open
+    between batches, which also keeps MySQL's unbuffered cursors out of it.
+    """
+    columns = [Game.__table__.c[name] for name in EXPORT_COLUMNS if name != "moves"] + [Game.move_log]
+    clauses = filters.clauses()
+    db = SessionLocal()
+    try:
+        last_id = 0
+        while True:
+            games = db.execute(
+                select(*columns).where(Game.id > last_id, *clauses).order_by(Game.id).limit(batch_size)
+            ).mappings().all()
+            if not games:
+                return
+            last_id = games[-1]["id"]
+            # Games with a packed move log carry their moves; the rest need a query
+            row_games = [game["id"] for game in games if game["move_log"] is None]
+            moves = db.execute(
+                select(Move.game_id, Move.row, Move.col)
+                .where(Move.game_id.in_(row_games))
+                .order_by(Move.game_id, Move.move_number)
+            ).all() if row_games else []
+            cells = {
+                game_id: format_moves((move.row, move.col) for move in group)
+                for game_id, group in groupby(moves, key=lambda move: move.game_id)
+            }
+            for game in games:
+                if game["move_log"] is not None:
+                    cells[game["id"]] = _log_moves(game["move_log"], game["board_size"])
+            yield [
+                {name: game[name] for name in EXPORT_COLUMNS if name != "moves"} | {"moves": cells.get(game["id"], "")}
+                for game in games
+            ]
+    finally:
+        db.close()
+
+def iter_game_batches(filters: ExportFilters, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[dict]]:
+    """Matching games with their moves, batch by batch, in id order.
+
+    Archived games are merged in, as in game_controller.get_user_games_page.
+    """
+    games = heapq.merge(
+        (game for batch in iter_database_batches(filters, batch_size) for game in batch),
+        iter_archived_games(filters),
+        key=lambda game: game["id"]
+    )
+    while True:
+        batch = list(islice(games, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def export_games(filters: ExportFilters, fmt: str = "ndjson", batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+    """The export as text chunks, one per batch (fmt is a key of EXPORT_FORMATS)"""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        for batch in iter_game_batches(filters, batch_size):
+            writer.writerows([_value(game[name]) for name in EXPORT_COLUMNS] for game in batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+        return
+    for batch in iter_game_batches(filters, batch_size):
+        yield "".join(
+            json.dumps({name: _value(value) for name, value in game.items()}, ensure_ascii=False) + "\n"
+            for game in batch
+        )
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Export games and their moves as NDJSON or CSV")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    parser.add_argument("--user", type=int, help="only games of this user id")
+    parser.add_argument("--status", choices=[value.value for value in GameStatus])
+    parser.add_argument("--since", type=datetime.fromisoformat, help="created at or after (ISO date)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="created before (ISO date)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument("--output", "-o", help="file to write (default: stdout)")
+    args = parser.parse_args(argv)
+
+    filters = export_filters(args.user, args.status, args.since, args.until)
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        for chunk in export_games(filters, args.format, args.batch_size):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,178 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased, selectinload
+from sqlalchemy import func, literal, select, tuple_, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from fastapi import HTTPException, status
-from typing import List, Optional, Tuple
+from typing import List, NamedTuple, Optional, Tuple
+from datetime import datetime
+import base64
+import binascii
+import os
+from starlette.concurrency import run_in_threadpool
 
-from app.models.models import Game, User, Move, GameStatus
-from app.schemas.schemas import GameCreate, GameBoard
+from app.models.models import Game, User, Move, GameStatus, BotDifficulty
+from app.schemas.schemas import GameCreate, GameBoard, GameSummary
+from app.engine.bitboard import Bitboard, X, O
+from app.cache.lru import LRUCache
+from app.controllers.game_hub import game_hub
+from app.controllers.stats_controller import record_game_result
+from app.controllers.leaderboard import record_ratings
+from app.controllers.move_store import store_for, new_move_log
+from app.database.archive import game_archive, to_game
+
+# Board cache settings. Each worker process has its own cache, so the TTL
+# bounds how stale a board can be when another worker wrote the move.
+BOARD_CACHE_SIZE = int(os.getenv("BOARD_CACHE_SIZE", "2048"))
+BOARD_CACHE_TTL = float(os.getenv("BOARD_CACHE_TTL", "5"))
+
+# Long-poll waits on the board/game endpoints, in seconds
+LONG_POLL_TIMEOUT = 25.0
+LONG_POLL_MAX_TIMEOUT = 60.0
+
+class CachedBoard(NamedTuple):
+    board: bytes
+    board_size: int
+    win_length: int
+    status: str
+
+board_cache = LRUCache(maxsize=BOARD_CACHE_SIZE, ttl=BOARD_CACHE_TTL)
 
 def create_game(db: Session, game: GameCreate, current_user_id: int):
     """Create a new game"""
-    # Validate board size and win length
-    if game.board_size < 3 or game.board_size > 10:
-        raise HTTPException(status_code=400, detail="Board size must be between 3 and 10")
-    if game.win_length < 3 or game.win_length > game.board_size:
-        raise HTTPException(status_code=400, detail="Win length must be between 3 and board size")
+    validate_game_settings(game.board_size, game.win_length)
     
     db_game = Game(
         player_x_id=current_user_id,
         player_o_id=game.player_o_id,
         status=GameStatus.IN_PROGRESS.value,
         board_size=game.board_size,
-        win_length=game.win_length
+        win_length=game.win_length,
+        board=Bitboard(game.board_size, game.win_length).pack(),
+        move_log=new_move_log()
     )
     db.add(db_game)
     db.commit()
     db.refresh(db_game)
     return db_game
 
+def validate_game_settings(board_size: int, win_length: int):
+    """Validate board size and win length"""
+    if board_size < 3 or board_size > 10:
+        raise HTTPException(status_code=400, detail="Board size must be between 3 and 10")
+    if win_length < 3 or win_length > board_size:
+        raise HTTPException(status_code=400, detail="Win length must be between 3 and board size")
+
 def get_game(db: Session, game_id: int):
-    """Get game by ID"""
-    game = db.query(Game).filter(Game.id == game_id).first()
+    """Get game by ID, from the archive if it was moved there"""
+    game = db.get(Game, game_id) or game_archive.game(game_id)
     if game is None:
         raise HTTPException(status_code=404, detail="Game not found")
     return game
 
+# Largest page the game list endpoints serve
+MAX_PAGE_SIZE = 500
+
+# Columns of the summary projection (GameSummary); everything but the board blob
+SUMMARY_COLUMNS = tuple(GameSummary.model_fields)
+
+def encode_cursor(game: Game) -> str:
+    """Opaque keyset cursor pointing just after a game in newest-first order"""
+    raw = f"{game.created_at.isoformat()}|{game.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """(created_at, id) of a cursor; 400 if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, game_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(game_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def user_games_statement(
+    user_id: int, limit: int, cursor: Optional[str] = None, skip: int = 0, summary: bool = False
+):
+    """A user's games, newest first, without an OR filter.
+
+    Each branch of the UNION ALL walks one (player_*_id, created_at, id)
+    index from the cursor and stops after skip + limit rows, so a page
+    never scans or sorts the user's whole history. Returns the aliased
+    Game entity (or the summary columns) and the statement.
+    """
+    columns = [Game.__table__.c[name] for name in SUMMARY_COLUMNS] if summary else list(Game.__table__.c)
+    after = None
+    if cursor:
+        created_at, game_id = decode_cursor(cursor)
+        # Compare with the stored value of the cursor's game: SQLite keeps
+        # datetimes as text, and rows written before the column's storage
+        # format may differ from it. The decoded value covers an archived or
+        # deleted game, bound with the column type so it is formatted like
+        # the stored values.
+        stored = select(Game.created_at).where(Game.id == game_id).scalar_subquery()
+        after = tuple_(func.coalesce(stored, literal(created_at, Game.created_at.type)), game_id)
+    
+    def branch(*conditions):
+        stmt = select(*columns).where(*conditions)
+        if after is not None:
+            stmt = stmt.where(tuple_(Game.created_at, Game.id) < after)
+        stmt = stmt.order_by(Game.created_at.desc(), Game.id.desc()).limit(skip + limit)
+        return select(stmt.subquery())
+    
+    # Games against yourself appear only in the X branch
+    games = union_all(
+        branch(Game.player_x_id == user_id),
+        branch(Game.player_o_id == user_id, Game.player_x_id != user_id),
+    ).subquery()
+    if summary:
+        source = games.c
+        stmt = select(*games.c)
+    else:
+        source = aliased(Game, games)
+        stmt = select(source)
+    stmt = stmt.order_by(source.created_at.desc(), source.id.desc()).offset(skip).limit(limit)
+    return source, stmt
+
+def archived_user_games(user_id: int, limit: int, cursor: Optional[str] = None, skip: int = 0) -> list:
+    """A user's archived games that can fall on the page (newest first)"""
+    return game_archive.user_games(user_id, skip + limit, decode_cursor(cursor) if cursor else None)
+
+def merge_archived(items: list, archived: list, skip: int, summary: bool = False) -> list:
+    """Merge a page of database rows fetched without skip with archived
+    games, newest first, and apply the skip"""
+    archived = [
+        GameSummary.model_validate(game._asdict()) if summary else to_game(game)
+        for game in archived
+    ]
+    merged = sorted(list(items) + archived, key=lambda game: (game.created_at, game.id), reverse=True)
+    return merged[skip:]
+
 def get_user_games(db: Session, user_id: int, skip: int = 0, limit: int = 100):
     """Get games where user is player X or player O"""
-    return db.query(Game).filter(
-        (Game.player_x_id == user_id) | (Game.player_o_id == user_id)
-    ).order_by(Game.created_at.desc()).offset(skip).limit(limit).all()
+    games, _ = get_user_games_page(db, user_id, limit, skip=skip)
+    return games
+
+def get_user_games_page(
+    db: Session, user_id: int, limit: int = 50, cursor: Optional[str] = None,
+    skip: int = 0, summary: bool = False
+) -> Tuple[list, Optional[str]]:
+    """One page of a user's games and the cursor of the next page (or None).
+
+    With summary, rows are GameSummary projections; otherwise full games
+    with their moves, loaded for the whole page in one batched query.
+    Archived games of the user are merged in.
+    """
+    archived = archived_user_games(user_id, limit + 1, cursor, skip)
+    # With archived games in the mix the skip applies after merging
+    db_skip, db_limit = (0, skip + limit + 1) if archived else (skip, limit + 1)
+    source, stmt = user_games_statement(user_id, db_limit, cursor, db_skip, summary)
+    if summary:
+        items = [GameSummary.model_validate(row) for row in db.execute(stmt).all()]
+    else:
+        items = db.scalars(stmt.options(selectinload(source.moves))).all()
+    if archived:
+        items = merge_archived(items, archived, skip, summary)
+    next_cursor = encode_cursor(items[limit - 1]) if len(items) > limit else None
+    return items[:limit], next_cursor
 
 def join_game(db: Session, game_id: int, user_id: int):
     """Join an existing game as player O"""
@@ -51,13 +186,51 @@ def join_game(db: Session, game_id: int, user_id: int):
     
     game.player_o_id = user_id
     db.commit()
+    invalidate_board(game_id)
+    game_hub.publish(game_id, {"type": "join", "player_o_id": user_id})
     db.refresh(game)
     return game
 
 def make_move(db: Session, game_id: int, user_id: int, row: int, col: int):
     """Make a move in the game"""
     game = get_game(db, game_id)
+    board = get_bitboard(db, game)
+    current_player = validate_move(game, board, user_id, row, col)
+    new_move, game_status = apply_move(game, board, user_id, row, col, current_player)
+    store = store_for(game)
+    store.add(db, game, new_move)
+    ratings = []
+    if game_status != GameStatus.IN_PROGRESS:
+        # Read the new ratings now: the commit expires the rows
+        ratings = [(s.user_id, s.rating, s.games) for s in record_game_result(db, game)]
     
+    # The move, the game snapshot and the players' stats are committed together
+    commit_move(db, game_id)
+    record_ratings(ratings)
+    store.saved(db, new_move)
+    publish_move(game_id, board, new_move, game_status)
+    return new_move
+
+# Answer to a move that lost the race against another move on the same game
+CONCURRENT_MOVE_DETAIL = "The game was changed by another move, reload it and try again"
+
+def commit_move(db: Session, game_id: int):
+    """Commit a move; 409 if another move on the game was committed first.
+
+    The game UPDATE is flushed before the move INSERT and only matches the
+    move count the board was read with (see Game.__mapper_args__), so the
+    loser of a race writes nothing. The unique (game_id, move_number)
+    index backs this up.
+    """
+    try:
+        db.commit()
+    except (StaleDataError, IntegrityError):
+        db.rollback()
+        invalidate_board(game_id)
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=CONCURRENT_MOVE_DETAIL)
+
+def validate_move(game: Game, board: Bitboard, user_id: int, row: int, col: int) -> str:
+    """Check that user_id may play (row, col) now; returns the mover's symbol"""
     # Check if game is still in progress
     if game.status != GameStatus.IN_PROGRESS.value:
         raise HTTPException(status_code=400, detail="Game is already finished")
@@ -70,12 +243,9 @@ def make_move(db: Session, game_id: int, user_id: int, row: int, col: int):
     if user_id != game.player_x_id and user_id != game.player_o_id:
         raise HTTPException(status_code=403, detail="You are not part of this game")
     
-    # Get current board state
-    board_state, move_count = get_board_state(db, game_id)
-    
     # Determine current player based on move count
-    current_player = "X" if move_count % 2 == 0 else "O"
-    expected_player_id = game.player_x_id if current_player == "X" else game.player_o_id
+    current_player = board.current_player
+    expected_player_id = game.player_x_id if current_player == X else game.player_o_id
     
     # Check if it's the user's turn
     if user_id != expected_player_id:
@@ -84,116 +254,208 @@ def make_move(db: Session, game_id: int, user_id: int, row: int, col: int):
             detail=f"It's not your turn. Current player: {current_player}"
         )
     
-    # Check if cell is empty
-    if board_state[row][col] is not None:
+    # Check if cell is on the board and empty
+    if not board.in_bounds(row, col):
+        raise HTTPException(status_code=400, detail="Cell is outside the board")
+    if not board.is_legal(row, col):
         raise HTTPException(status_code=400, detail="Cell is already occupied")
-    
-    # Make the move
+    return current_player
+
+def apply_move(
+    game: Game, board: Bitboard, user_id: int, row: int, col: int, symbol: str
+) -> Tuple[Move, GameStatus]:
+    """Play a validated move on the board and game; the caller stores the Move (see move_store) and commits"""
     new_move = Move(
-        game_id=game_id,
+        game_id=game.id,
         user_id=user_id,
         row=row,
         col=col,
-        symbol=current_player,
-        move_number=move_count + 1
+        symbol=symbol,
+        move_number=board.move_count + 1
     )
-    db.add(new_move)
-    db.commit()
     
     # Update board state with the new move
-    board_state[row][col] = current_player
+    board.play(row, col, symbol)
+    save_board(game, board)
     
-    # Check if the game is over
-    game_status, winner_id = check_game_status(board_state, game)
+    # Check if the game is over (only lines through the new move can change)
+    game_status, winner_id = check_game_status(board, game, last_move=(row, col))
     
     if game_status != GameStatus.IN_PROGRESS:
         game.status = game_status.value
         game.winner_id = winner_id
-        db.commit()
+    return new_move, game_status
+
+def publish_move(game_id: int, board: Bitboard, move: Move, game_status: GameStatus):
+    """After commit: write the board through to the cache and notify subscribers"""
+    cache_board(game_id, board, game_status.value)
+    game_hub.publish(game_id, {
+        "type": "move",
+        "row": move.row,
+        "col": move.col,
+        "symbol": move.symbol,
+        "move_number": move.move_number,
+        "status": game_status.value,
+        "current_player": board.current_player if game_status == GameStatus.IN_PROGRESS else None,
+    })
+
+def get_bitboard(db: Session, game: Game) -> Bitboard:
+    """Get the engine board for a game from its stored snapshot"""
+    if game.board is not None:
+        return Bitboard.unpack(game.board_size, game.win_length, game.board)
     
-    db.refresh(new_move)
-    return new_move
+    # Games created before snapshots existed are replayed once and backfilled
+    board = Bitboard.from_moves(game.board_size, game.win_length, store_for(game).cells(db, game))
+    save_board(game, board)
+    return board
+
+def save_board(game: Game, board: Bitboard):
+    """Copy the engine board onto the game's snapshot columns"""
+    game.board = board.pack()
+    game.move_count = board.move_count
+    game.current_player = board.current_player
+
+def cache_board(game_id: int, board: Bitboard, status: str):
+    """Write a committed board through to the board cache"""
+    board_cache.set(game_id, CachedBoard(board.pack(), board.size, board.win_length, status))
+
+def invalidate_board(game_id: int):
+    """Drop a game from the board cache"""
+    board_cache.pop(game_id)
+
+def lookup_board(game_id: int, game: Optional[Game] = None) -> Optional[Tuple[Bitboard, str]]:
+    """Engine board and status from the board cache only, or None on a miss.
+
+    Given the game's row (anything with move_count and status), an entry
+    that does not match it is dropped and counts as a miss: another worker
+    process moved since it was cached.
+    """
+    entry = board_cache.get(game_id)
+    if entry is None:
+        return None
+    board = Bitboard.unpack(entry.board_size, entry.win_length, entry.board)
+    if game is not None and (board.move_count, entry.status) != (game.move_count or 0, game.status):
+        invalidate_board(game_id)
+        return None
+    return board, entry.status
+
+def get_cached_board(db: Session, game_id: int, game: Optional[Game] = None) -> Tuple[Bitboard, str]:
+    """Get the engine board and status for a game, via the board cache.
+
+    Pass the game if it was just loaded: the cache entry is checked against it.
+    """
+    cached = lookup_board(game_id, game)
+    if cached is not None:
+        return cached
+    
+    if game is None:
+        game = get_game(db, game_id)
+    board = get_bitboard(db, game)
+    cache_board(game_id, board, game.status)
+    return board, game.status
+
+def get_game_version(db: Session, game_id: int) -> Tuple[int, str]:
+    """Move count and status of a game.
+
+    Read from the game's row, not the board cache: another worker process
+    may have written a move the cache has not seen, and ETags built from a
+    stale version would answer 304 for a changed board. A cache entry
+    behind the row is dropped. Archived games have no row and never change.
+    """
+    row = db.execute(select(Game.move_count, Game.status).where(Game.id == game_id)).first()
+    if row is None:
+        board, game_status = get_cached_board(db, game_id)
+        return board.move_count, game_status
+    lookup_board(game_id, row)
+    return row.move_count or 0, row.status
+
+def board_etag(db: Session, game_id: int) -> str:
+    """ETag of a game's board: changes with every move and status change"""
+    move_count, game_status = get_game_version(db, game_id)
+    return f'"{game_id}-{move_count}-{game_status}"'
+
+def game_etag(game: Game) -> str:
+    """ETag of a game resource; also changes when player O joins"""
+    return f'"{game.id}-{game.move_count or 0}-{game.status}-{game.player_o_id or 0}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header covers the given ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+async def wait_for_move(db: Session, game_id: int, after_move: int, timeout: float):
+    """Long-poll: return once the game has more than after_move moves or
+    the timeout passes. Waits on the game hub, not a sleep loop."""
+    queue = game_hub.subscribe(game_id)
+    try:
+        # Subscribed before checking, so a move committed in between is not missed
+        move_count, game_status = await run_in_threadpool(get_game_version, db, game_id)
+        game_hub.observe(game_id, move_count=move_count)
+        if move_count <= after_move and game_status == GameStatus.IN_PROGRESS.value:
+            # Give the connection back to the pool while parked; this also
+            # expires loaded objects so the response reads fresh rows
+            await run_in_threadpool(db.rollback)
+            await game_hub.wait(queue, timeout)
+    finally:
+        game_hub.unsubscribe(game_id, queue)
 
 def get_board_state(db: Session, game_id: int) -> Tuple[List[List[Optional[str]]], int]:
     """Get the current board state for a game"""
-    game = get_game(db, game_id)
-    # Create empty board with dynamic size
-    board = [[None for _ in range(game.board_size)] for _ in range(game.board_size)]
-    
-    # Get all moves for this game ordered by move number
-    moves = db.query(Move).filter(Move.game_id == game_id).order_by(Move.move_number).all()
-    
-    # Fill in the board with moves
-    for move in moves:
-        board[move.row][move.col] = move.symbol
-    
-    return board, len(moves)
-
-def check_game_status(board: List[List[Optional[str]]], game: Game) -> Tuple[GameStatus, Optional[int]]:
-    """Check if the game is won, drawn, or still in progress"""
-    size = game.board_size
-    win_length = game.win_length
-    
-    # Check rows
-    for row in range(size):
-        for col in range(size - win_length + 1):
-            window = board[row][col:col + win_length]
-            if all(x == "X" for x in window):
-                return GameStatus.X_WON, game.player_x_id
-            if all(x == "O" for x in window):
-                return GameStatus.O_WON, game.player_o_id
-    
-    # Check columns
-    for col in range(size):
-        for row in range(size - win_length + 1):
-            window = [board[row + i][col] for i in range(win_length)]
-            if all(x == "X" for x in window):
-                return GameStatus.X_WON, game.player_x_id
-            if all(x == "O" for x in window):
-                return GameStatus.O_WON, game.player_o_id
-    
-    # Check diagonals
-    for row in range(size - win_length + 1):
-        for col in range(size - win_length + 1):
-            # Check diagonal from top-left to bottom-right
-            window = [board[row + i][col + i] for i in range(win_length)]
-            if all(x == "X" for x in window):
-                return GameStatus.X_WON, game.player_x_id
-            if all(x == "O" for x in window):
-                return GameStatus.O_WON, game.player_o_id
-            
-            # Check diagonal from top-right to bottom-left
-            window = [board[row + i][col + win_length - 1 - i] for i in range(win_length)]
-            if all(x == "X" for x in window):
-                return GameStatus.X_WON, game.player_x_id
-            if all(x == "O" for x in window):
-                return GameStatus.O_WON, game.player_o_id
+    board, _ = get_cached_board(db, game_id)
+    return board.to_rows(), board.move_count
+
+def check_game_status(
+    board: Bitboard, game: Game, last_move: Optional[Tuple[int, int]] = None
+) -> Tuple[GameStatus, Optional[int]]:
+    """Check if the game is won, drawn, or still in progress.
+
+    With last_move, only the lines through that cell are checked for the
+    player who occupies it; otherwise the whole board is scanned.
+    """
+    if last_move is not None:
+        symbol = board.get(*last_move)
+        winner = symbol if symbol and board.wins_at(last_move[0], last_move[1], symbol) else None
+    else:
+        winner = board.winner()
+    if winner == X:
+        return GameStatus.X_WON, game.player_x_id
+    if winner == O:
+        return GameStatus.O_WON, game.player_o_id
     
     # Check if board is full (draw)
-    is_full = all(cell is not None for row in board for cell in row)
-    if is_full:
+    if board.is_full():
         return GameStatus.DRAW, None
     
     # Game is still in progress
     return GameStatus.IN_PROGRESS, None
 
-def get_game_with_board(db: Session, game_id: int) -> GameBoard:
+def get_game_with_board(db: Session, game_id: int, game: Optional[Game] = None) -> GameBoard:
     """Get game with current board state"""
-    game = get_game(db, game_id)
-    board, move_count = get_board_state(db, game_id)
-    
+    board, game_status = get_cached_board(db, game_id, game)
+    return build_game_board(board, game_status)
+
+def build_game_board(board: Bitboard, game_status: str) -> GameBoard:
+    """GameBoard schema for an engine board"""
     current_player = None
-    if game.status == GameStatus.IN_PROGRESS.value:
-        current_player = "X" if move_count % 2 == 0 else "O"
+    if game_status == GameStatus.IN_PROGRESS.value:
+        current_player = board.current_player
     
     return GameBoard(
-        board=board,
-        status=game.status,
+        board=board.to_rows(),
+        status=game_status,
         current_player=current_player
     )
 
-def create_bot_game(db: Session, current_user_id: int, board_size: int = 3, win_length: int = 3) -> Game:
+def create_bot_game(
+    db: Session, current_user_id: int, board_size: int = 3, win_length: int = 3,
+    bot_difficulty: str = BotDifficulty.MEDIUM.value
+) -> Game:
     """Create a new game against the bot"""
+    if bot_difficulty not in {level.value for level in BotDifficulty}:
+        raise HTTPException(status_code=400, detail="Unknown bot difficulty")
+    
     # Get or create bot user
     bot_user = db.query(User).filter(User.username == "bot").first()
     if not bot_user:
@@ -214,20 +476,25 @@ def create_bot_game(db: Session, current_user_id: int, board_size: int = 3, win_
         player_o_id=bot_user.id,
         status=GameStatus.IN_PROGRESS.value,
         is_bot_game=True,
+        bot_difficulty=bot_difficulty,
         board_size=board_size,
-        win_length=win_length
+        win_length=win_length,
+        board=Bitboard(board_size, win_length).pack(),
+        move_log=new_move_log()
     )
     db.add(db_game)
     db.commit()
     db.refresh(db_game)
     return db_game
 
-def handle_bot_move(db: Session, game_id: int) -> Optional[Move]:
+def handle_bot_move(db: Session, game_id: int, game: Optional[Game] = None) -> Optional[Move]:
     """Handle bot's move if it's a bot game"""
-    game = get_game(db, game_id)
+    if game is None:
+        game = get_game(db, game_id)
     if not game.is_bot_game:
         return None
     
     from app.controllers.bot_controller import TicTacToeBot
-    bot = TicTacToeBot(db, game_id, game.player_o_id)
-    return bot.make_move() 
\ No newline at end of file
+    bot = TicTacToeBot(db, game_id, game.player_o_id, game=game)
+    return bot.make_move()
+ 
\ No newline at end of file
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Events buffered per subscriber before it is considered too slow
+SUBSCRIBER_QUEUE_SIZE = 64
+
+
+class GameHub:
+    """In-process fan-out of game events to WebSocket subscribers.
+
+    Controllers publish after their commit, possibly from a threadpool
+    thread; each event is handed to every subscriber's queue on the
+    subscriber's own event loop. Only subscribers in this worker process
+    are reached; changes made by other processes arrive through the game
+    watcher, which compares the database with the versions recorded here.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[int, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        # (move count, has player O) of each subscribed game as last
+        # published or observed in this process; None is not known yet
+        self._versions: Dict[int, Tuple[Optional[int], Optional[bool]]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, game_id: int) -> asyncio.Queue:
+        """Register the calling coroutine for a game's events"""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(game_id, []).append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, game_id: int, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(game_id, [])
+            self._subscribers[game_id] = [item for item in subscribers if item[1] is not queue]
+            if not self._subscribers[game_id]:
+                del self._subscribers[game_id]
+                self._versions.pop(game_id, None)
+
+    def publish(self, game_id: int, event: dict):
+        """Send an event to every subscriber of a game (thread-safe)"""
+        if event["type"] == "move":
+            self.observe(game_id, move_count=event["move_number"])
+        elif event["type"] == "join":
+            self.observe(game_id, joined=True)
+        with self._lock:
+            subscribers = list(self._subscribers.get(game_id, ()))
+        self.published += 1
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # Subscriber's loop is closed; it unsubscribes on its way out
+                pass
+
+    def observe(self, game_id: int, move_count: Optional[int] = None, joined: Optional[bool] = None):
+        """Record a state of a subscribed game that its subscribers have seen"""
+        with self._lock:
+            if game_id in self._subscribers:
+                self._versions[game_id] = self._merge(game_id, move_count, joined)
+
+    def catch_up(self, game_id: int, move_count: int, joined: bool) -> bool:
+        """Record a game's state read from the database; True if it is newer
+        than anything this process published or observed"""
+        with self._lock:
+            if game_id not in self._subscribers:
+                return False
+            known_moves, known_joined = self._versions.get(game_id, (None, None))
+            newer = (
+                (known_moves is not None and move_count > known_moves)
+                or (known_joined is False and joined)
+            )
+            self._versions[game_id] = self._merge(game_id, move_count, joined)
+            return newer
+
+    def _merge(self, game_id: int, move_count: Optional[int], joined: Optional[bool]):
+        known_moves, known_joined = self._versions.get(game_id, (None, None))
+        if move_count is not None and (known_moves is None or move_count > known_moves):
+            known_moves = move_count
+        if joined is not None and not known_joined:
+            known_joined = joined
+        return known_moves, known_joined
+
+    def watched_games(self) -> List[int]:
+        """Games with subscribers in this process"""
+        with self._lock:
+            return list(self._subscribers)
+
+    def _deliver(self, queue: asyncio.Queue, event: dict):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A stalled client gets a resync marker instead of the backlog
+            self.dropped += 1
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait({"type": "resync"})
+
+    async def wait(self, queue: asyncio.Queue, timeout: float, types=("move",)) -> bool:
+        """Wait on a subscription for an event of the given types.
+
+        Returns False if the timeout passed first.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            try:
+                event = await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                return False
+            if event["type"] in types or event["type"] == "resync":
+                return True
+
+    def subscriber_count(self, game_id: int) -> int:
+        with self._lock:
+            return len(self._subscribers.get(game_id, ()))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "games": len(self._subscribers),
+                "subscribers": sum(len(items) for items in self._subscribers.values()),
+                "published": self.published,
+                "dropped": self.dropped,
+            }
+
+
+game_hub = GameHub()
@@ -0,0 +1,86 @@
+import asyncio
+import os
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.database.db import AsyncSessionLocal
+from app.models.models import Game
+from app.controllers.game_hub import game_hub
+from app.controllers.game_controller import invalidate_board
+
+# Seconds between checks of the games this process has subscribers for;
+# 0 turns the watcher off (a single worker process needs none)
+GAME_WATCH_INTERVAL = float(os.getenv("GAME_WATCH_INTERVAL", "1"))
+
+
+class GameWatcher:
+    """Relays moves and joins made by other worker processes to game_hub.
+
+    The hub only reaches subscribers in its own process. With several
+    workers, this task reads the move count and player O of every game
+    that has subscribers here, in one query per interval. A game that moved
+    past what this process last published or observed gets its board cache
+    entry dropped and a "resync" event, which makes WebSocket clients
+    reload and wakes long-polls.
+    """
+
+    def __init__(self, interval: float = GAME_WATCH_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.checks = 0
+        self.relayed = 0
+        self.failed = 0
+
+    def start(self):
+        """Start the watcher on the running event loop (idempotent)"""
+        if self.interval <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except Exception as e:
+                self.failed += 1
+                print(f"Game watcher error: {str(e)}")
+
+    async def check(self) -> int:
+        """Compare the watched games with the database; returns the number relayed"""
+        game_ids = game_hub.watched_games()
+        if not game_ids:
+            return 0
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(Game.id, Game.move_count, Game.player_o_id).where(Game.id.in_(game_ids))
+            )).all()
+        self.checks += 1
+        relayed = 0
+        for row in rows:
+            if game_hub.catch_up(row.id, row.move_count or 0, row.player_o_id is not None):
+                invalidate_board(row.id)
+                game_hub.publish(row.id, {"type": "resync"})
+                relayed += 1
+        self.relayed += relayed
+        return relayed
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "running": self._task is not None and not self._task.done(),
+            "watched": len(game_hub.watched_games()),
+            "checks": self.checks,
+            "relayed": self.relayed,
+            "failed": self.failed,
+        }
+
+
+game_watcher = GameWatcher()
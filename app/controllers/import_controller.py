@@ -0,0 +1,161 @@
+import os
+import re
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.models import Game, Move, User, GameStatus
+from app.schemas.schemas import GameImport
+from app.engine.bitboard import Bitboard, X
+from app.controllers.game_controller import validate_game_settings, check_game_status
+from app.controllers.move_store import new_move_log
+from app.engine import move_log
+
+# Games flushed per INSERT batch; the whole request is still one transaction
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+
+# One move: column letter a-j, then row number 1-10
+MOVE_PATTERN = re.compile(r"([a-j])(10|[1-9])")
+NOTATION_PATTERN = re.compile(r"(?:[a-j](?:10|[1-9]))*")
+
+def parse_moves(notation: str) -> List[Tuple[int, int]]:
+    """(row, col) cells of a move list such as "b2 a1 c3" """
+    compact = "".join(notation.split()).lower()
+    if not NOTATION_PATTERN.fullmatch(compact):
+        raise HTTPException(status_code=400, detail="Moves must look like 'b2 a1 c3'")
+    return [(int(number) - 1, ord(letter) - ord("a")) for letter, number in MOVE_PATTERN.findall(compact)]
+
+def format_moves(cells) -> str:
+    """Inverse of parse_moves"""
+    return " ".join(f"{chr(ord('a') + col)}{row + 1}" for row, col in cells)
+
+def naive_utc(value: datetime) -> datetime:
+    """A datetime as the database stores it: naive UTC, whole seconds"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.replace(microsecond=0)
+
+def replay_import(spec: GameImport) -> Tuple[dict, List[dict]]:
+    """Play an imported game through the engine.
+
+    Returns the games row, with snapshot, status and winner, and the move
+    rows (without game_id) as plain dicts; 400 on an illegal game.
+    """
+    validate_game_settings(spec.board_size, spec.win_length)
+    board = Bitboard(spec.board_size, spec.win_length)
+    game_status, winner_id, moves = GameStatus.IN_PROGRESS, None, []
+    for number, (row, col) in enumerate(parse_moves(spec.moves), start=1):
+        if game_status != GameStatus.IN_PROGRESS:
+            raise HTTPException(status_code=400, detail=f"Move {number} is played after the game ended")
+        if not board.in_bounds(row, col):
+            raise HTTPException(status_code=400, detail=f"Move {number} is outside the board")
+        if not board.is_legal(row, col):
+            raise HTTPException(status_code=400, detail=f"Move {number} plays an occupied cell")
+        symbol = board.current_player
+        board.play(row, col, symbol)
+        moves.append({
+            "user_id": spec.player_x_id if symbol == X else spec.player_o_id,
+            "row": row,
+            "col": col,
+            "symbol": symbol,
+            "move_number": number,
+        })
+        # check_game_status only reads the player ids, which the spec has
+        game_status, winner_id = check_game_status(board, spec, last_move=(row, col))
+
+    game = {
+        "player_x_id": spec.player_x_id,
+        "player_o_id": spec.player_o_id,
+        "status": game_status.value,
+        "winner_id": winner_id,
+        "board_size": spec.board_size,
+        "win_length": spec.win_length,
+        "board": board.pack(),
+        "move_count": board.move_count,
+        "current_player": board.current_player,
+    }
+    return game, moves
+
+def insert_games(db: Session, rows: List[dict]) -> List[int]:
+    """Insert games rows, returning their ids in order.
+
+    One multi-row INSERT ... RETURNING where the dialect can keep the order
+    (SQLite, PostgreSQL, MariaDB); one INSERT per game elsewhere (MySQL).
+    """
+    table = Game.__table__
+    if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        stmt = table.insert().returning(table.c.id, sort_by_parameter_order=True)
+        return list(db.execute(stmt, rows).scalars())
+    return [db.execute(table.insert().values(row)).inserted_primary_key[0] for row in rows]
+
+def import_games(db: Session, games: List[GameImport], importer_id: int) -> dict:
+    """Validate games in memory and bulk-insert the valid ones.
+
+    The importer must be one of the players of each game. Invalid games
+    are reported by index and skipped. Valid ones are written in batches
+    of IMPORT_BATCH_SIZE, as Core executemany INSERTs that skip the ORM
+    unit of work. With MOVE_STORAGE=packed the moves go into each game's
+    move log instead of the moves table. Only the importer vouches for the
+    results, so imported games never count towards stats or ratings.
+    Everything is committed together.
+    """
+    started = time.perf_counter()
+    player_ids = {spec.player_x_id for spec in games} | {spec.player_o_id for spec in games}
+    users: Dict[int, bool] = dict(db.execute(select(User.id, User.is_bot).where(User.id.in_(player_ids))).all())
+    # Undated games and their moves are stamped with the DB clock, read once
+    now = db.scalar(select(func.now()))
+    packed = new_move_log() is not None
+
+    errors, valid = [], []
+    for index, spec in enumerate(games):
+        try:
+            if importer_id not in (spec.player_x_id, spec.player_o_id):
+                raise HTTPException(status_code=403, detail="You can only import your own games")
+            missing = [user_id for user_id in (spec.player_x_id, spec.player_o_id) if user_id not in users]
+            if missing:
+                raise HTTPException(status_code=400, detail=f"Unknown player {missing[0]}")
+            game, moves = replay_import(spec)
+        except HTTPException as e:
+            errors.append({"index": index, "detail": e.detail})
+            continue
+        created_at = naive_utc(spec.created_at) if spec.created_at else now
+        game.update(
+            is_bot_game=users[spec.player_o_id], is_imported=True, created_at=created_at, updated_at=created_at,
+        )
+        if packed:
+            # The moves go into the game row; imported moves share its time
+            at = int(created_at.replace(tzinfo=timezone.utc).timestamp())
+            game["move_log"] = move_log.encode((move["row"] * spec.board_size + move["col"], at) for move in moves)
+            moves = []
+        else:
+            for move in moves:
+                move["created_at"] = created_at
+        valid.append((game, moves))
+
+    game_ids = []
+    for start in range(0, len(valid), IMPORT_BATCH_SIZE):
+        batch = valid[start:start + IMPORT_BATCH_SIZE]
+        ids = insert_games(db, [game for game, _ in batch])
+        move_rows = []
+        for game_id, (game, moves) in zip(ids, batch):
+            for move in moves:
+                move["game_id"] = game_id
+            move_rows.extend(moves)
+        if move_rows:
+            db.execute(Move.__table__.insert(), move_rows)
+        game_ids.extend(ids)
+
+    db.commit()
+
+    seconds = time.perf_counter() - started
+    return {
+        "imported": len(game_ids),
+        "game_ids": game_ids,
+        "errors": errors,
+        "seconds": round(seconds, 4),
+        "games_per_second": round(len(game_ids) / seconds, 1) if seconds else 0.0,
+    }
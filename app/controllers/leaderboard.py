@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.models import User, UserStats
+
+# Seconds between incremental syncs with the database. Moves finished in
+# this process update the board at once; the sync picks up other workers
+LEADERBOARD_SYNC_INTERVAL = float(os.getenv("LEADERBOARD_SYNC_INTERVAL", "5"))
+LEADERBOARD_MAX_LIMIT = 100
+# Rows stamped this long before the newest one seen are read again: the
+# stamp is taken before commit, and SQLite stores it with whole seconds
+LEADERBOARD_SYNC_OVERLAP = timedelta(seconds=2)
+
+
+class Leaderboard:
+    """In-memory ranking of rated users.
+
+    Keeps a sorted list of (-rating, user_id) so a rank is one bisect and
+    the top N is a slice; a rating change is one delete and one insort.
+    The first read loads every row through the rating index, and later
+    reads only fetch user_stats rows whose updated_at moved past the last
+    one seen. Bots play rated games but are not listed: a user the sync
+saw as a bot is remembered, and its later rating changes are ignored.
+    """
+
+    def __init__(self, sync_interval: float = LEADERBOARD_SYNC_INTERVAL):
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._keys: List[Tuple[float, int]] = []
+        self._ratings: Dict[int, float] = {}
+        self._names: Dict[int, str] = {}
+        self._games: Dict[int, int] = {}
+        self._bots: set = set()
+        # Users rated in this process that the next sync has to look up
+        self._unknown: set = set()
+        self._loaded = False
+        self._synced_at = 0.0
+        self._last_updated: Optional[datetime] = None
+        self.full_loads = 0
+        self.syncs = 0
+
+    def update(self, user_id: int, rating: float, games: Optional[int] = None):
+        """Apply a committed rating change"""
+        with self._lock:
+            if user_id not in self._bots:
+                self._set(user_id, rating, games)
+
+    def _set(self, user_id: int, rating: float, games: Optional[int]):
+        old = self._ratings.get(user_id)
+        if old is not None:
+            index = bisect_left(self._keys, (-old, user_id))
+            del self._keys[index]
+        elif self._loaded and user_id not in self._names:
+            self._unknown.add(user_id)
+        self._ratings[user_id] = rating
+        if games is not None:
+            self._games[user_id] = games
+        insort(self._keys, (-rating, user_id))
+
+    def _drop(self, user_id: int):
+        old = self._ratings.pop(user_id, None)
+        if old is not None:
+            del self._keys[bisect_left(self._keys, (-old, user_id))]
+        self._games.pop(user_id, None)
+        self._names.pop(user_id, None)
+
+    def sync(self, db: Session, force: bool = False):
+        """Bring the ranking up to date with the database if it is due"""
+        with self._lock:
+            if not force and self._loaded and not self._unknown \
+                    and time.monotonic() - self._synced_at < self.sync_interval:
+                return
+            stmt = select(
+                UserStats.user_id, UserStats.rating, UserStats.games, UserStats.updated_at,
+                User.username, User.is_bot
+            ).join(User, User.id == UserStats.user_id)
+            if self._loaded and self._last_updated is not None:
+                stmt = stmt.where(UserStats.updated_at >= self._last_updated - LEADERBOARD_SYNC_OVERLAP)
+            else:
+                self._keys, self._ratings, self._names, self._games = [], {}, {}, {}
+                stmt = stmt.order_by(UserStats.rating.desc())
+                self.full_loads += 1
+            self._apply(db.execute(stmt).all())
+
+            if self._unknown:
+                rows = db.execute(
+                    select(
+                        UserStats.user_id, UserStats.rating, UserStats.games, UserStats.updated_at,
+                        User.username, User.is_bot
+                    ).join(User, User.id == UserStats.user_id).where(UserStats.user_id.in_(self._unknown))
+                ).all()
+                self._apply(rows)
+                self._unknown.clear()
+            self._loaded = True
+            self._synced_at = time.monotonic()
+            self.syncs += 1
+
+    def _apply(self, rows: Iterable):
+        if not self._loaded and not self._keys:
+            # Full load: rows arrive ordered by rating, so build the list directly
+            self._bots.update(row.user_id for row in rows if row.is_bot)
+            rows = [row for row in rows if not row.is_bot]
+            self._keys = sorted((-row.rating, row.user_id) for row in rows)
+            for row in rows:
+                self._ratings[row.user_id] = row.rating
+                self._games[row.user_id] = row.games
+                self._names[row.user_id] = row.username
+                self._track(row.updated_at)
+            return
+        for row in rows:
+            self._track(row.updated_at)
+            if row.is_bot:
+                self._bots.add(row.user_id)
+                self._drop(row.user_id)
+                continue
+            self._names[row.user_id] = row.username
+            self._set(row.user_id, row.rating, row.games)
+
+    def _track(self, updated_at: Optional[datetime]):
+        if updated_at is not None and (self._last_updated is None or updated_at > self._last_updated):
+            self._last_updated = updated_at
+
+    def _entry(self, rank: int, user_id: int) -> dict:
+        return {
+            "rank": rank,
+            "user_id": user_id,
+            "username": self._names.get(user_id),
+            "rating": round(self._ratings[user_id], 1),
+            "games": self._games.get(user_id, 0),
+        }
+
+    def top(self, limit: int) -> List[dict]:
+        with self._lock:
+            return [self._entry(index + 1, user_id) for index, (_, user_id) in enumerate(self._keys[:limit])]
+
+    def rank_of(self, user_id: int) -> Optional[dict]:
+        with self._lock:
+            rating = self._ratings.get(user_id)
+            if rating is None or user_id not in self._names:
+                return None
+            return self._entry(bisect_left(self._keys, (-rating, user_id)) + 1, user_id)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._keys),
+            "full_loads": self.full_loads,
+            "syncs": self.syncs,
+            "pending_lookups": len(self._unknown),
+        }
+
+
+leaderboard = Leaderboard()
+
+
+def record_ratings(rows: Iterable[Tuple[int, float, int]]):
+    """Push (user_id, rating, games) of committed stats rows to the leaderboard;
+    bots are skipped once a sync has seen them"""
+    for user_id, rating, games in rows:
+        leaderboard.update(user_id, rating, games)
+
+
+def get_leaderboard(db: Session, user_id: int, limit: int = 10) -> dict:
+    """Top players and the given user's own position"""
+    leaderboard.sync(db)
+    return {
+        "total": len(leaderboard),
+        "top": leaderboard.top(min(limit, LEADERBOARD_MAX_LIMIT)),
+        "me": leaderboard.rank_of(user_id),
+    }
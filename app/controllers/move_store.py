@@ -0,0 +1,80 @@
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.models import Game, Move
+from app.engine import move_log
+
+# Layout for the moves of new games: "rows" (one moves row per move) or
+# "packed" (one binary log on the game, appended by the game UPDATE).
+# Existing games keep the layout they were created with.
+MOVE_STORAGE = os.getenv("MOVE_STORAGE", "rows")
+
+
+class MoveStore(ABC):
+    """Where the moves of a game live.
+
+    The layout is fixed per game: a game with a move_log (even an empty
+    one) is packed, any other game keeps its moves as rows. Reads for API
+    responses go through Game.move_history; the board itself always comes
+    from the game's snapshot.
+    """
+
+    @abstractmethod
+    def add(self, db: Session, game: Game, move: Move):
+        """Record a move made by apply_move; written by the caller's commit"""
+
+    def saved(self, db: Session, move: Move):
+        """Load server-set fields of a committed move (sync sessions)"""
+
+    @abstractmethod
+    def cells(self, db: Session, game: Game) -> List[Tuple[int, int, str]]:
+        """(row, col, symbol) of every move, in order"""
+
+
+class RowMoveStore(MoveStore):
+    """One moves row per move"""
+
+    def add(self, db: Session, game: Game, move: Move):
+        db.add(move)
+
+    def saved(self, db: Session, move: Move):
+        db.refresh(move)
+
+    def cells(self, db: Session, game: Game) -> List[Tuple[int, int, str]]:
+        return db.execute(
+            select(Move.row, Move.col, Move.symbol).where(Move.game_id == game.id).order_by(Move.move_number)
+        ).all()
+
+
+class PackedMoveStore(MoveStore):
+    """All moves in games.move_log: a move costs no INSERT, only the game UPDATE"""
+
+    def add(self, db: Session, game: Game, move: Move):
+        now = time.time()
+        game.move_log = move_log.append(game.move_log, move.row * game.board_size + move.col, int(now))
+        # The Move stays transient; give it what a saved row would have
+        move.id = move.move_number
+        move.created_at = datetime.fromtimestamp(int(now), timezone.utc).replace(tzinfo=None)
+
+    def cells(self, db: Session, game: Game) -> List[Tuple[int, int, str]]:
+        return [(move.row, move.col, move.symbol) for move in move_log.logged_moves(game)]
+
+
+row_store = RowMoveStore()
+packed_store = PackedMoveStore()
+
+
+def store_for(game: Game) -> MoveStore:
+    """The store a game's moves are kept in"""
+    return packed_store if game.move_log is not None else row_store
+
+
+def new_move_log():
+    """move_log value for a game created now: b"" when packing, else NULL"""
+    return b"" if MOVE_STORAGE == "packed" else None
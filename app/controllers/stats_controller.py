@@ -0,0 +1,155 @@
+from typing import Dict, Iterable, List
+import heapq
+import os
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Game, GameStatus, UserStats
+from app.database.archive import game_archive
+
+# Result of a finished game from one player's side
+WIN, LOSS, DRAW = "win", "loss", "draw"
+SCORES = {WIN: 1.0, LOSS: 0.0, DRAW: 0.5}
+
+# Elo settings
+INITIAL_RATING = 1200.0
+RATING_K_FACTOR = float(os.getenv("RATING_K_FACTOR", "32"))
+
+def new_user_stats(user_id: int) -> UserStats:
+    """Empty stats row (column defaults only apply on insert)"""
+    return UserStats(
+        user_id=user_id, games=0, wins=0, losses=0, draws=0,
+        current_streak=0, best_win_streak=0, by_board_size={}, rating=INITIAL_RATING
+    )
+
+def game_results(game) -> Iterable[tuple]:
+    """(user_id, result) for each player of a finished game (a Game or a row)"""
+    players = {game.player_x_id, game.player_o_id} - {None}
+    for user_id in players:
+        if game.status == GameStatus.DRAW.value:
+            yield user_id, DRAW
+        elif len(players) == 1:
+            # A game against yourself is both a win and a loss; count it once
+            yield user_id, WIN
+        else:
+            yield user_id, WIN if game.winner_id == user_id else LOSS
+
+def apply_result(stats: UserStats, result: str, board_size: int):
+    """Add one finished game to a stats row"""
+    stats.games += 1
+    if result == WIN:
+        stats.wins += 1
+        stats.current_streak = stats.current_streak + 1 if stats.current_streak > 0 else 1
+        stats.best_win_streak = max(stats.best_win_streak, stats.current_streak)
+    elif result == LOSS:
+        stats.losses += 1
+        stats.current_streak = stats.current_streak - 1 if stats.current_streak < 0 else -1
+    else:
+        stats.draws += 1
+        stats.current_streak = 0
+    
+    # JSON columns only notice reassignment, so build a new dict
+    by_size = {size: dict(counts) for size, counts in (stats.by_board_size or {}).items()}
+    counts = by_size.setdefault(str(board_size), {"games": 0, "wins": 0, "losses": 0, "draws": 0})
+    counts["games"] += 1
+    counts[{WIN: "wins", LOSS: "losses", DRAW: "draws"}[result]] += 1
+    stats.by_board_size = by_size
+
+def update_ratings(rows: Dict[int, UserStats], results: Dict[int, str]):
+    """Elo update for a two-player game; games against yourself are unrated"""
+    if len(rows) != 2:
+        return
+    first, second = rows.values()
+    expected = 1 / (1 + 10 ** ((second.rating - first.rating) / 400))
+    delta = RATING_K_FACTOR * (SCORES[results[first.user_id]] - expected)
+    first.rating += delta
+    second.rating -= delta
+
+def is_counted(game) -> bool:
+    """Whether a finished game counts towards stats and ratings"""
+    return not getattr(game, "is_imported", False)
+
+def record_game_result(db: Session, game: Game) -> List[UserStats]:
+    """Update both players' stats and ratings for a game that just finished.
+
+    Called before the commit that marks the game finished, so the stats and
+    the result are written in one transaction. Returns the updated rows
+    (none for an imported game).
+    """
+    if not is_counted(game):
+        return []
+    rows, results = {}, dict(game_results(game))
+    for user_id, result in results.items():
+        stats = db.get(UserStats, user_id, with_for_update=True)
+        if stats is None:
+            stats = new_user_stats(user_id)
+            db.add(stats)
+        apply_result(stats, result, game.board_size)
+        rows[user_id] = stats
+    update_ratings(rows, results)
+    return list(rows.values())
+
+async def record_game_result_async(db: AsyncSession, game: Game) -> List[UserStats]:
+    """Async version of record_game_result"""
+    if not is_counted(game):
+        return []
+    rows, results = {}, dict(game_results(game))
+    for user_id, result in results.items():
+        stats = await db.get(UserStats, user_id, with_for_update=True)
+        if stats is None:
+            stats = new_user_stats(user_id)
+            db.add(stats)
+        apply_result(stats, result, game.board_size)
+        rows[user_id] = stats
+    update_ratings(rows, results)
+    return list(rows.values())
+
+def get_user_stats(db: Session, user_id: int) -> UserStats:
+    """Stats of a user; an empty row if they never finished a game"""
+    return db.get(UserStats, user_id) or new_user_stats(user_id)
+
+async def get_user_stats_async(db: AsyncSession, user_id: int) -> UserStats:
+    """Async version of get_user_stats"""
+    return await db.get(UserStats, user_id) or new_user_stats(user_id)
+
+def backfill_user_stats(db: Session, batch_size: int = 1000) -> int:
+    """Rebuild every stats row from the finished games; returns the game count.
+
+    Games are replayed in the order they finished, so streaks and ratings
+    come out as they would have been recorded live. Archived games count
+    too; imported games do not.
+    """
+    db.execute(delete(UserStats))
+    rows = {}
+    finished = db.execute(
+        select(Game.id, Game.player_x_id, Game.player_o_id, Game.status, Game.winner_id, Game.board_size, Game.updated_at)
+        .where(Game.status != GameStatus.IN_PROGRESS.value, Game.is_imported.is_not(True))
+        .order_by(Game.updated_at, Game.id)
+        .execution_options(yield_per=batch_size)
+    )
+    count = 0
+    archived = (game for game in game_archive.finished_games() if is_counted(game))
+    games = heapq.merge(archived, finished, key=lambda game: (game.updated_at, game.id))
+    for game in games:
+        results = dict(game_results(game))
+        for user_id, result in results.items():
+            if user_id not in rows:
+                rows[user_id] = new_user_stats(user_id)
+            apply_result(rows[user_id], result, game.board_size)
+        update_ratings({user_id: rows[user_id] for user_id in results}, results)
+        count += 1
+    db.add_all(rows.values())
+    db.commit()
+    return count
+
+
+if __name__ == "__main__":
+    from app.database.db import SessionLocal, init_db
+    init_db()
+    db = SessionLocal()
+    try:
+        count = backfill_user_stats(db)
+        print(f"Rebuilt user stats from {count} finished games")
+    finally:
+        db.close()
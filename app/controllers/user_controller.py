@@ -2,7 +2,8 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from app.models.models import User
 from app.schemas.schemas import UserCreate
-from app.controllers.auth import get_password_hash, get_user_by_username
+from app.controllers.auth import get_password_hash, get_user_by_username, invalidate_user_tokens
+from app.controllers.password_hasher import password_hasher
 
 def create_user(db: Session, user: UserCreate):
     """
@@ -25,7 +26,7 @@ def create_user(db: Session, user: UserCreate):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = password_hasher.run(get_password_hash, user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -59,5 +60,6 @@ def update_user_active_status(db: Session, user_id: int, is_active: bool):
     user = get_user(db, user_id)
     user.is_active = is_active
     db.commit()
+    invalidate_user_tokens(user_id)
     db.refresh(user)
     return user 
\ No newline at end of file
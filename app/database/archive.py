@@ -0,0 +1,393 @@
+"""Append-only columnar archive of old finished games, read through mmap.
+
+``python -m app.database.archive --days 90`` moves finished games whose
+last update is older than that out of the games and moves tables. Each run
+appends segment files to ARCHIVE_DIR; a segment is never rewritten.
+
+A segment is one file of fixed-width native arrays: game ids (ascending),
+players, winner, status, board size, win length, timestamps, and offsets
+into a blob of packed move logs (see app.engine.move_log). After them
+comes a player index: (player id, row) pairs sorted by player and then
+newest game first. Readers map every segment read-only, so all worker
+processes share the same page-cache pages; a game is found by bisecting
+the ids, a player's games by bisecting the index.
+
+get_game and the game lists fall back to the archive for games that are
+not in the database. User stats rows are not touched by archiving.
+"""
+import argparse
+import heapq
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, func, inspect, select
+from sqlalchemy.orm import Session
+
+from app.models.models import Game, Move, GameStatus, BotDifficulty
+from app.engine.bitboard import Bitboard
+from app.engine import move_log
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", str(BASE_DIR / "data" / "archive")))
+# Finished games untouched for this many days are archived
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+# Games per segment file (and per delete transaction)
+ARCHIVE_SEGMENT_SIZE = int(os.getenv("ARCHIVE_SEGMENT_SIZE", "100000"))
+
+MAGIC = b"TTTA"
+VERSION = 2
+# magic, version, reserved, game count, index entries, move log bytes
+HEADER = struct.Struct("<4sB3xIII")
+
+# Per-game columns and their array type codes
+GAME_COLUMNS = (
+    ("id", "q"), ("created_at", "q"), ("updated_at", "q"),
+    ("player_x_id", "i"), ("player_o_id", "i"), ("winner_id", "i"),
+    ("status", "B"), ("bot_difficulty", "B"), ("is_bot_game", "B"),
+    ("board_size", "B"), ("win_length", "B"), ("move_count", "B"), ("is_imported", "B"),
+)
+
+# Enum columns are stored as their index; NO_VALUE stands for NULL
+STATUSES = [value.value for value in GameStatus]
+DIFFICULTIES = [value.value for value in BotDifficulty]
+NO_VALUE = 0xFF
+
+
+class ArchivedGame(NamedTuple):
+    """A game read from the archive; same fields as a games row, minus the board"""
+    id: int
+    player_x_id: int
+    player_o_id: Optional[int]
+    status: str
+    winner_id: Optional[int]
+    is_bot_game: bool
+    bot_difficulty: Optional[str]
+    board_size: int
+    win_length: int
+    move_count: int
+    move_log: bytes
+    created_at: datetime
+    updated_at: datetime
+    is_imported: bool = False
+
+
+def _to_time(value: datetime) -> int:
+    # Naive datetimes from the database are UTC
+    return int(value.replace(tzinfo=timezone.utc).timestamp())
+
+
+def _from_time(value: int) -> datetime:
+    return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+
+
+def _layout(count: int, index_count: int, log_size: int) -> Dict[str, Tuple[int, str, int]]:
+    """(offset, type code, length) of every array in a segment, 8-byte aligned"""
+    arrays = list(GAME_COLUMNS) + [("log_offset", "I"), ("log", "B"), ("index_player", "i"), ("index_row", "i")]
+    lengths = {"log_offset": count + 1, "log": log_size, "index_player": index_count, "index_row": index_count}
+    layout, offset = {}, HEADER.size
+    for name, code in arrays:
+        offset = -(-offset // 8) * 8
+        length = lengths.get(name, count)
+        layout[name] = (offset, code, length)
+        offset += length * array(code).itemsize
+    return layout
+
+
+def write_segment(path: Path, games: List[ArchivedGame]) -> int:
+    """Write games (ascending ids) as a segment file; returns its size.
+
+    The file is written next to its final name and renamed into place, so
+    readers never see a partial segment.
+    """
+    columns = {name: array(code) for name, code in GAME_COLUMNS}
+    log, offsets, index = bytearray(), array("I", [0]), []
+    for row, game in enumerate(games):
+        values = game._asdict()
+        values.update(
+            created_at=_to_time(game.created_at),
+            updated_at=_to_time(game.updated_at),
+            player_o_id=game.player_o_id or 0,
+            winner_id=game.winner_id or 0,
+            status=STATUSES.index(game.status),
+            bot_difficulty=DIFFICULTIES.index(game.bot_difficulty) if game.bot_difficulty in DIFFICULTIES else NO_VALUE,
+            is_bot_game=int(bool(game.is_bot_game)),
+            is_imported=int(bool(game.is_imported)),
+        )
+        for name, column in columns.items():
+            column.append(values[name])
+        log += game.move_log
+        offsets.append(len(log))
+        # Games against yourself are indexed once
+        for player_id in {game.player_x_id, game.player_o_id} - {None}:
+            index.append((player_id, -values["created_at"], -game.id, row))
+    index.sort()
+    arrays = dict(
+        columns,
+        log_offset=offsets,
+        log=array("B", log),
+        index_player=array("i", [entry[0] for entry in index]),
+        index_row=array("i", [entry[3] for entry in index]),
+    )
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(games), len(index), len(log)))
+        for name, (offset, _, _) in _layout(len(games), len(index), len(log)).items():
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(arrays[name].tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp_path, path)
+    return size
+
+
+class ArchiveSegment:
+    """Read-only view of a segment file through mmap"""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, index_count, log_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not an archive segment: {path}")
+        self.path = path
+        self.count = count
+        view = memoryview(self._mmap)
+        self._arrays = {
+            name: view[offset:offset + length * array(code).itemsize].cast(code)
+            for name, (offset, code, length) in _layout(count, index_count, log_size).items()
+        }
+        self.ids = self._arrays["id"]
+
+    def find(self, game_id: int) -> Optional[int]:
+        """Row of a game in this segment, or None"""
+        row = bisect_left(self.ids, game_id)
+        return row if row < self.count and self.ids[row] == game_id else None
+
+    def game(self, row: int) -> ArchivedGame:
+        a = self._arrays
+        difficulty = a["bot_difficulty"][row]
+        return ArchivedGame(
+            id=a["id"][row],
+            player_x_id=a["player_x_id"][row],
+            player_o_id=a["player_o_id"][row] or None,
+            status=STATUSES[a["status"][row]],
+            winner_id=a["winner_id"][row] or None,
+            is_bot_game=bool(a["is_bot_game"][row]),
+            bot_difficulty=DIFFICULTIES[difficulty] if difficulty != NO_VALUE else None,
+            board_size=a["board_size"][row],
+            win_length=a["win_length"][row],
+            move_count=a["move_count"][row],
+            move_log=bytes(a["log"][a["log_offset"][row]:a["log_offset"][row + 1]]),
+            created_at=_from_time(a["created_at"][row]),
+            updated_at=_from_time(a["updated_at"][row]),
+            is_imported=bool(a["is_imported"][row]),
+        )
+
+    def player_rows(self, user_id: int, before: Optional[Tuple[datetime, int]] = None) -> memoryview:
+        """Rows of a player's games, newest first, older than before (created_at, id)"""
+        players = self._arrays["index_player"]
+        rows = self._arrays["index_row"][bisect_left(players, user_id):bisect_right(players, user_id)]
+        if before is None:
+            return rows
+        # Within a player the index is sorted by (-created_at, -id)
+        created_at, ids = self._arrays["created_at"], self.ids
+        key = (-before[0].replace(tzinfo=timezone.utc).timestamp(), -before[1])
+        return rows[bisect_right(rows, key, key=lambda row: (-created_at[row], -ids[row])):]
+
+    def games_by_update(self) -> List[ArchivedGame]:
+        """Every game, in the order they finished"""
+        updated_at = self._arrays["updated_at"]
+        rows = sorted(range(self.count), key=lambda row: (updated_at[row], self.ids[row]))
+        return [self.game(row) for row in rows]
+
+
+class GameArchive:
+    """All segments in a directory; picks up segments added by later runs"""
+
+    def __init__(self, directory: Path = ARCHIVE_DIR):
+        self.directory = directory
+        self._segments: Dict[str, ArchiveSegment] = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def segments(self) -> List[ArchiveSegment]:
+        """Mapped segments, oldest first; rescans when the directory changed"""
+        try:
+            mtime = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        with self._lock:
+            if mtime != self._mtime:
+                for path in sorted(self.directory.glob("segment-*.bin")):
+                    if path.name not in self._segments:
+                        self._segments[path.name] = ArchiveSegment(path)
+                self._mtime = mtime
+            return list(self._segments.values())
+
+    def get(self, game_id: int) -> Optional[ArchivedGame]:
+        for segment in self.segments():
+            row = segment.find(game_id)
+            if row is not None:
+                return segment.game(row)
+        return None
+
+    def game(self, game_id: int) -> Optional[Game]:
+        """An archived game as a detached Game, or None"""
+        archived = self.get(game_id)
+        return to_game(archived) if archived is not None else None
+
+    def user_games(
+        self, user_id: int, limit: int, before: Optional[Tuple[datetime, int]] = None
+    ) -> List[ArchivedGame]:
+        """Up to limit of a player's games, newest first, older than before (created_at, id)"""
+        pages = [
+            [segment.game(row) for row in segment.player_rows(user_id, before)[:limit]]
+            for segment in self.segments()
+        ]
+        merged = heapq.merge(*pages, key=lambda game: (game.created_at, game.id), reverse=True)
+        return list(merged)[:limit]
+
+    def finished_games(self) -> Iterator[ArchivedGame]:
+        """Every archived game, in the order they finished"""
+        return heapq.merge(
+            *(segment.games_by_update() for segment in self.segments()),
+            key=lambda game: (game.updated_at, game.id)
+        )
+
+    def next_path(self) -> Path:
+        names = sorted(self.directory.glob("segment-*.bin"))
+        number = int(names[-1].stem.split("-")[1]) + 1 if names else 1
+        return self.directory / f"segment-{number:06d}.bin"
+
+
+def to_game(archived: ArchivedGame) -> Game:
+    """A transient Game for an archived game; its moves come from the log"""
+    board = Bitboard(archived.board_size, archived.win_length)
+    for cell, _ in move_log.decode(archived.move_log):
+        board.play(*divmod(cell, archived.board_size), board.current_player)
+    return Game(
+        **archived._asdict(),
+        board=board.pack(),
+        current_player=board.current_player,
+    )
+
+
+def is_archived(game: Game) -> bool:
+    """Whether a game was read from the archive (it has no database row)"""
+    return inspect(game).transient
+
+
+game_archive = GameArchive()
+
+
+def _archived_batch(db: Session, games: list) -> List[ArchivedGame]:
+    """ArchivedGame records for games rows, with their moves packed"""
+    row_games = [game.id for game in games if game.move_log is None]
+    moves = db.execute(
+        select(Move.game_id, Move.row, Move.col, Move.created_at)
+        .where(Move.game_id.in_(row_games))
+        .order_by(Move.game_id, Move.move_number)
+    ).all() if row_games else []
+    sizes = {game.id: game.board_size for game in games}
+    logs = {
+        game_id: move_log.encode((move.row * sizes[game_id] + move.col, _to_time(move.created_at)) for move in group)
+        for game_id, group in groupby(moves, key=lambda move: move.game_id)
+    }
+    return [
+        ArchivedGame(
+            id=game.id,
+            player_x_id=game.player_x_id,
+            player_o_id=game.player_o_id,
+            status=game.status,
+            winner_id=game.winner_id,
+            is_bot_game=bool(game.is_bot_game),
+            bot_difficulty=game.bot_difficulty,
+            board_size=game.board_size,
+            win_length=game.win_length,
+            move_count=game.move_count or 0,
+            move_log=game.move_log if game.move_log is not None else logs.get(game.id, b""),
+            created_at=game.created_at,
+            updated_at=game.updated_at,
+            is_imported=bool(game.is_imported),
+        )
+        for game in games
+    ]
+
+
+def _delete_games(db: Session, game_ids: List[int], batch_size: int = 1000):
+    for start in range(0, len(game_ids), batch_size):
+        ids = game_ids[start:start + batch_size]
+        db.execute(delete(Move).where(Move.game_id.in_(ids)))
+        db.execute(delete(Game).where(Game.id.in_(ids)))
+
+
+def archive_games(
+    db: Session, days: int = ARCHIVE_AFTER_DAYS, segment_size: int = ARCHIVE_SEGMENT_SIZE,
+    archive: GameArchive = game_archive, batch_size: int = 1000
+) -> int:
+    """Move finished games not updated for days into new segments; returns the count.
+
+    Every segment is written and synced before its games are deleted, in
+    one transaction per segment. A run that stopped in between is picked
+    up by the next one: games that are already archived are only deleted.
+    Run one job at a time.
+    """
+    cutoff = db.scalar(select(func.now())) - timedelta(days=days)
+    columns = [Game.__table__.c[name] for name in ArchivedGame._fields]
+    total, last_id = 0, 0
+    while True:
+        pending, done = [], []
+        while len(pending) < segment_size:
+            games = db.execute(
+                select(*columns).where(
+                    Game.id > last_id,
+                    Game.status != GameStatus.IN_PROGRESS.value,
+                    Game.updated_at < cutoff,
+                ).order_by(Game.id).limit(min(batch_size, segment_size - len(pending)))
+            ).all()
+            if not games:
+                break
+            last_id = games[-1].id
+            already = {game.id for game in games if archive.get(game.id) is not None}
+            done += already
+            pending += _archived_batch(db, [game for game in games if game.id not in already])
+        if not pending and not done:
+            break
+        if pending:
+            write_segment(archive.next_path(), pending)
+        _delete_games(db, [game.id for game in pending] + done)
+        db.commit()
+        total += len(pending)
+        print(f"Archived {len(pending)} games, removed {len(done)} already archived ones")
+    return total
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Move old finished games into the archive")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="archive games finished before this many days ago")
+    parser.add_argument("--segment-size", type=int, default=ARCHIVE_SEGMENT_SIZE)
+    args = parser.parse_args(argv)
+
+    from app.database.db import SessionLocal, init_db
+    init_db()
+    db = SessionLocal()
+    try:
+        count = archive_games(db, args.days, args.segment_size)
+        print(f"Archived {count} games into {ARCHIVE_DIR}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -14,11 +16,103 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 # SQLite URL - используем SQLite вместо MySQL для упрощения
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR}/tictactoe.db")
 
+# Async drivers for the same databases (used by the async web routes)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+}
+
+def to_async_url(url: str) -> str:
+    """Swap the sync driver of a database URL for its async counterpart"""
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+def env_flag(name: str, default: bool) -> bool:
+    return os.getenv(name, "1" if default else "0").lower() in ("1", "true", "yes", "on")
+
+# SQLite: applied on every new connection. WAL lets readers run alongside
+# the single writer; busy_timeout makes a second writer wait instead of
+# failing with "database is locked"
+SQLITE_PRAGMAS = (
+    ("journal_mode", os.getenv("SQLITE_JOURNAL_MODE", "WAL")),
+    ("synchronous", os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")),
+    ("busy_timeout", int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))),
+    ("mmap_size", int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))),
+    # Negative values are KiB: 64 MiB of page cache per connection
+    ("cache_size", int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))),
+)
+
+# Server databases (MySQL): connection pool per engine and worker process
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = env_flag("DB_POOL_PRE_PING", True)
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+def engine_options(url: str) -> dict:
+    """create_engine keyword arguments for a database URL"""
+    if is_sqlite(url):
+        # SQLAlchemy's default SQLite pooling is already right per driver
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Connect hook: set SQLITE_PRAGMAS on a new DBAPI connection"""
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+def make_engine(url: str, is_async: bool = False):
+    """Create the sync or async engine for a URL with the production profile"""
+    if is_async:
+        created = create_async_engine(url, **engine_options(url))
+        sync_engine = created.sync_engine
+    else:
+        created = sync_engine = create_engine(url, **engine_options(url))
+    if is_sqlite(url):
+        event.listen(sync_engine, "connect", apply_sqlite_pragmas)
+    return created
+
+def describe_engine(engine: Engine) -> str:
+    """Effective settings of an engine, for the startup log"""
+    url = engine.url.render_as_string(hide_password=True)
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as connection:
+            settings = ", ".join(
+                f"{pragma}={connection.exec_driver_sql(f'PRAGMA {pragma}').scalar()}"
+                for pragma, _ in SQLITE_PRAGMAS
+            )
+    else:
+        pool = engine.pool
+        settings = (
+            f"pool={type(pool).__name__} size={DB_POOL_SIZE} max_overflow={DB_MAX_OVERFLOW} "
+            f"timeout={DB_POOL_TIMEOUT} recycle={DB_POOL_RECYCLE} pre_ping={DB_POOL_PRE_PING}"
+        )
+    return f"{url} ({settings})"
+
 # Create engine
-engine = create_engine(DATABASE_URL)
+engine = make_engine(DATABASE_URL)
+async_engine = make_engine(ASYNC_DATABASE_URL, is_async=True)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay loaded after commit: attribute access must never hit the
+# database implicitly in async code
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Base class for models
 Base = declarative_base()
@@ -31,7 +125,19 @@ def get_db():
     finally:
         db.close()
 
+# Function to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # Create all tables
 def init_db():
+    """Create missing tables and apply pending migrations. Returns after a
+    version check once the schema is current, so running it again is cheap"""
     from app.models.models import Base
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    from app.database.migrations import current_version, migrate, LATEST_VERSION
+    if current_version(engine) >= LATEST_VERSION:
+        return
+    Base.metadata.create_all(bind=engine)
+    # create_all never alters existing tables; migrations bring them up to date
+    migrate(engine) 
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""Versioned schema migrations.
+
+``Base.metadata.create_all`` only creates missing tables; it never adds
+columns or indexes to tables that already exist. Every schema change after
+the first release is therefore a numbered step in MIGRATIONS. Applied steps
+are recorded in the schema_version table, and init_db runs the pending ones
+in order, each in its own transaction.
+
+Steps must be idempotent: on a fresh database create_all has already built
+the latest schema, and the steps only get recorded.
+
+Run by hand with ``python -m app.database.migrations``.
+"""
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.database.db import engine as default_engine
+from app.engine.bitboard import Bitboard
+from app.models.models import Game, Move, UserStats, BotDifficulty
+from app.controllers.stats_controller import backfill_user_stats
+
+schema_version = Table(
+    "schema_version", MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200)),
+    Column("applied_at", DateTime),
+)
+
+
+def add_column(connection: Connection, column: Column) -> bool:
+    """ALTER TABLE ... ADD COLUMN for a model column, unless it exists;
+    returns whether it was added"""
+    table = column.table.name
+    existing = {c["name"] for c in inspect(connection).get_columns(table)}
+    if column.name in existing:
+        return False
+    column_type = column.type.compile(dialect=connection.dialect)
+    default = ""
+    if column.default is not None and column.default.is_scalar:
+        value = column.default.arg
+        default = f" DEFAULT {value!r}" if isinstance(value, str) else f" DEFAULT {value}"
+    connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column.name} {column_type}{default}")
+    return True
+
+
+def add_game_snapshot_columns(connection: Connection):
+    if add_column(connection, Game.bot_difficulty.property.columns[0]):
+        # Bot games from before difficulty levels keep the one-ply heuristic
+        # bot they were started with, instead of the column default
+        connection.execute(
+            Game.__table__.update().where(Game.is_bot_game.is_(True)).values(bot_difficulty=BotDifficulty.EASY.value)
+        )
+    for column in (Game.board, Game.move_count, Game.current_player):
+        add_column(connection, column.property.columns[0])
+
+    # Fill the snapshot of games that predate it from their moves
+    games = connection.execute(
+        select(Game.id, Game.board_size, Game.win_length).where(Game.board.is_(None))
+    ).all()
+    for game_id, board_size, win_length in games:
+        moves = connection.execute(
+            select(Move.row, Move.col, Move.symbol).where(Move.game_id == game_id).order_by(Move.move_number)
+        ).all()
+        board = Bitboard.from_moves(board_size or 3, win_length or 3, moves)
+        connection.execute(
+            Game.__table__.update().where(Game.id == game_id).values(
+                board=board.pack(), move_count=board.move_count, current_player=board.current_player
+            )
+        )
+
+
+def add_indexes(connection: Connection):
+    duplicates = connection.execute(
+        select(Move.game_id).group_by(Move.game_id, Move.move_number).having(func.count() > 1)
+    ).scalars().all()
+    if duplicates:
+        raise RuntimeError(
+            f"Games {sorted(set(duplicates))} have duplicate move numbers; "
+            "fix them before the unique (game_id, move_number) index can be created"
+        )
+    for table in (Game.__table__, Move.__table__):
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def add_user_stats(connection: Connection):
+    UserStats.__table__.create(connection, checkfirst=True)
+    backfill_user_stats(Session(bind=connection))
+
+
+def add_ratings(connection: Connection):
+    add_column(connection, UserStats.rating.property.columns[0])
+    for index in UserStats.__table__.indexes:
+        index.create(connection, checkfirst=True)
+    # Replay the finished games to compute the ratings
+    backfill_user_stats(Session(bind=connection))
+
+
+def add_move_log(connection: Connection):
+    add_column(connection, Game.move_log.property.columns[0])
+
+
+def add_imported_flag(connection: Connection):
+    add_column(connection, Game.is_imported.property.columns[0])
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "Board snapshot and bot difficulty columns on games", add_game_snapshot_columns),
+    (2, "Player, lobby and (game_id, move_number) indexes", add_indexes),
+    (3, "user_stats table, backfilled from finished games", add_user_stats),
+    (4, "Elo rating on user_stats, rating and updated_at indexes", add_ratings),
+    (5, "Packed move log column on games", add_move_log),
+    (6, "Imported flag on games, kept out of stats", add_imported_flag),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(engine: Engine = default_engine) -> int:
+    schema_version.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        return connection.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def migrate(engine: Engine = default_engine) -> int:
+    """Apply pending migrations; returns the schema version reached"""
+    version = current_version(engine)
+    for number, description, step in MIGRATIONS:
+        if number <= version:
+            continue
+        with engine.begin() as connection:
+            step(connection)
+            connection.execute(schema_version.insert().values(
+                version=number, description=description, applied_at=datetime.utcnow()
+            ))
+        print(f"Applied migration {number}: {description}")
+        version = number
+    return version
+
+
+if __name__ == "__main__":
+    from app.database.db import Base
+    Base.metadata.create_all(bind=default_engine)
+    print(f"Schema version: {migrate()}")
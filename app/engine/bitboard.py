@@ -0,0 +1,206 @@
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+X = "X"
+O = "O"
+
+
+class Bitboard:
+    """Tic-tac-toe board stored as two integer bitmasks, one per player.
+
+    Cell (row, col) maps to bit ``row * stride + col`` where ``stride`` is
+    ``size + 1``. The extra column is always empty, so shifting a mask to
+    walk along a row or a diagonal can never wrap onto the next row.
+    """
+
+    __slots__ = ("size", "win_length", "stride", "full_mask", "lines", "x", "o", "move_count")
+
+    def __init__(self, size: int, win_length: int, x: int = 0, o: int = 0):
+        self.size = size
+        self.win_length = win_length
+        self.stride = size + 1
+        self.full_mask = _full_mask(size)
+        self.lines = win_lines(size, win_length)
+        self.x = x
+        self.o = o
+        # Kept as a counter so draw detection never rescans the board
+        self.move_count = (x | o).bit_count()
+
+    @classmethod
+    def from_moves(cls, size: int, win_length: int, moves: Iterable[Tuple[int, int, str]]) -> "Bitboard":
+        """Build a board from (row, col, symbol) tuples"""
+        board = cls(size, win_length)
+        for row, col, symbol in moves:
+            board.play(row, col, symbol)
+        return board
+
+    @classmethod
+    def from_rows(cls, rows: List[List[Optional[str]]], win_length: int) -> "Bitboard":
+        """Build a board from the list-of-lists representation"""
+        board = cls(len(rows), win_length)
+        for row, cells in enumerate(rows):
+            for col, symbol in enumerate(cells):
+                if symbol is not None:
+                    board.play(row, col, symbol)
+        return board
+
+    @classmethod
+    def unpack(cls, size: int, win_length: int, data: bytes) -> "Bitboard":
+        """Inverse of pack()"""
+        width = len(data) // 2
+        x = int.from_bytes(data[:width], "little")
+        o = int.from_bytes(data[width:], "little")
+        return cls(size, win_length, x, o)
+
+    def pack(self) -> bytes:
+        """Compact encoding: the X mask followed by the O mask, little-endian"""
+        width = (self.size * self.stride + 7) // 8
+        return self.x.to_bytes(width, "little") + self.o.to_bytes(width, "little")
+
+    def copy(self) -> "Bitboard":
+        board = Bitboard.__new__(Bitboard)
+        for name in Bitboard.__slots__:
+            setattr(board, name, getattr(self, name))
+        return board
+
+    def bit(self, row: int, col: int) -> int:
+        """Single-bit mask for a cell"""
+        return 1 << (row * self.stride + col)
+
+    def cell_of(self, index: int) -> Tuple[int, int]:
+        """Inverse of bit(): (row, col) for a bit index"""
+        return divmod(index, self.stride)
+
+    @property
+    def occupied(self) -> int:
+        return self.x | self.o
+
+    @property
+    def current_player(self) -> str:
+        return X if self.move_count % 2 == 0 else O
+
+    def in_bounds(self, row: int, col: int) -> bool:
+        return 0 <= row < self.size and 0 <= col < self.size
+
+    def get(self, row: int, col: int) -> Optional[str]:
+        """Symbol at a cell, or None if it is empty"""
+        bit = self.bit(row, col)
+        if self.x & bit:
+            return X
+        if self.o & bit:
+            return O
+        return None
+
+    def is_legal(self, row: int, col: int) -> bool:
+        """Whether the cell is on the board and empty"""
+        return self.in_bounds(row, col) and not self.occupied & self.bit(row, col)
+
+    def play(self, row: int, col: int, symbol: str) -> None:
+        """Place a symbol on an empty cell"""
+        if not self.is_legal(row, col):
+            raise ValueError(f"Illegal move at {row}, {col}")
+        if symbol == X:
+            self.x |= self.bit(row, col)
+        else:
+            self.o |= self.bit(row, col)
+        self.move_count += 1
+
+    def mask_of(self, symbol: str) -> int:
+        return self.x if symbol == X else self.o
+
+    def has_won(self, symbol: str) -> bool:
+        """Whether symbol has win_length in a row anywhere on the board"""
+        return _has_line(self.mask_of(symbol), self.stride, self.win_length)
+
+    def wins_at(self, row: int, col: int, symbol: str) -> bool:
+        """Whether a line through (row, col) is complete for symbol.
+
+        Only the lines through the given cell are checked, so this is the
+        O(win_length) test to run right after a move at that cell.
+        """
+        mask = self.mask_of(symbol)
+        for line in self.lines[row * self.stride + col]:
+            if mask & line == line:
+                return True
+        return False
+
+    def wins_with(self, row: int, col: int, symbol: str) -> bool:
+        """Whether playing symbol at an empty cell would complete a line"""
+        mask = self.mask_of(symbol) | self.bit(row, col)
+        for line in self.lines[row * self.stride + col]:
+            if mask & line == line:
+                return True
+        return False
+
+    def is_full(self) -> bool:
+        return self.move_count == self.size * self.size
+
+    def winner(self) -> Optional[str]:
+        """X or O if either player has a line, otherwise None"""
+        if self.has_won(X):
+            return X
+        if self.has_won(O):
+            return O
+        return None
+
+    def empty_cells(self) -> Iterator[Tuple[int, int]]:
+        """Iterate over empty cells in row-major order"""
+        free = self.full_mask & ~self.occupied
+        while free:
+            low = free & -free
+            yield self.cell_of(low.bit_length() - 1)
+            free ^= low
+
+    def to_rows(self) -> List[List[Optional[str]]]:
+        """List-of-lists representation used by the API schemas and templates"""
+        return [[self.get(row, col) for col in range(self.size)] for row in range(self.size)]
+
+
+@lru_cache(maxsize=None)
+def win_lines(size: int, win_length: int) -> Tuple[Tuple[int, ...], ...]:
+    """Win-line masks through each cell, indexed by bit index.
+
+    Built once per (size, win_length) per process. Padding-column indexes
+    get an empty tuple.
+    """
+    stride = size + 1
+    through: List[List[int]] = [[] for _ in range(size * stride)]
+    for row in range(size):
+        for col in range(size):
+            for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_row = row + (win_length - 1) * d_row
+                end_col = col + (win_length - 1) * d_col
+                if not (0 <= end_row < size and 0 <= end_col < size):
+                    continue
+                cells = [(row + k * d_row) * stride + col + k * d_col for k in range(win_length)]
+                line = 0
+                for index in cells:
+                    line |= 1 << index
+                for index in cells:
+                    through[index].append(line)
+    return tuple(tuple(lines) for lines in through)
+
+
+@lru_cache(maxsize=None)
+def _full_mask(size: int) -> int:
+    """Mask with every playable cell set (padding column left clear)"""
+    row_mask = (1 << size) - 1
+    stride = size + 1
+    mask = 0
+    for row in range(size):
+        mask |= row_mask << (row * stride)
+    return mask
+
+
+def _has_line(mask: int, stride: int, win_length: int) -> bool:
+    """Shift-and-mask check for win_length consecutive bits in any direction"""
+    # Horizontal, vertical, diagonal and anti-diagonal steps between cells
+    for step in (1, stride, stride + 1, stride - 1):
+        run = mask
+        for k in range(1, win_length):
+            run &= mask >> (k * step)
+            if not run:
+                break
+        if run:
+            return True
+    return False
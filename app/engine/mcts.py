@@ -0,0 +1,250 @@
+import atexit
+import math
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from app.engine.bitboard import Bitboard, O, X
+
+# Worker processes for playouts; defaults to one per CPU
+MCTS_WORKERS = int(os.getenv("MCTS_WORKERS", "0")) or os.cpu_count() or 1
+# UCT exploration constant
+EXPLORATION = 1.4
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Process pool shared by every MCTS search in this worker process.
+
+    Created on first use and shut down at exit. forkserver is used where
+    available so the children never inherit the web server's threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                # Keep the fork server light: it only needs the engine
+                context.set_forkserver_preload([__name__])
+            else:
+                context = multiprocessing.get_context("spawn")
+            _pool = ProcessPoolExecutor(max_workers=MCTS_WORKERS, mp_context=context)
+            atexit.register(shutdown_pool)
+        return _pool
+
+
+def _ready() -> bool:
+    return True
+
+
+def warm_pool() -> threading.Thread:
+    """Start the pool's worker processes in the background.
+
+    A cold pool can spend a whole move's time budget starting up, so web
+    workers warm it when they start instead of on the first expert move.
+    """
+    def warm():
+        try:
+            pool = get_pool()
+            # One task per worker makes the pool start all of them
+            wait([pool.submit(_ready) for _ in range(MCTS_WORKERS)])
+        except Exception as e:
+            print(f"MCTS pool warm-up failed: {str(e)}")
+
+    thread = threading.Thread(target=warm, name="mcts-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+class _Node:
+    __slots__ = ("move", "mover", "parent", "children", "untried", "visits", "wins")
+
+    def __init__(self, move: int, mover: int, parent: Optional["_Node"], untried: List[int]):
+        self.move = move
+        self.mover = mover
+        self.parent = parent
+        self.children: List["_Node"] = []
+        self.untried = untried
+        self.visits = 0
+        # Score from the view of the player who made `move` (win 1, draw 0.5)
+        self.wins = 0.0
+
+
+def _free_indexes(full_mask: int, occupied: int) -> List[int]:
+    free = full_mask & ~occupied
+    indexes = []
+    while free:
+        low = free & -free
+        indexes.append(low.bit_length() - 1)
+        free ^= low
+    return indexes
+
+
+def _completes_line(mask: int, lines) -> bool:
+    for line in lines:
+        if mask & line == line:
+            return True
+    return False
+
+
+def run_playouts(size: int, win_length: int, x: int, o: int, time_limit: float, seed: int) -> Dict[int, Tuple[int, float]]:
+    """Single-threaded UCT search from a position.
+
+    Returns {bit index: (visits, wins)} for the root's children, with wins
+    counted for the side to move at the root. Runs in pool workers.
+    """
+    rng = random.Random(seed)
+    board = Bitboard(size, win_length, x, o)
+    lines = board.lines
+    full_mask = board.full_mask
+    root_player = 0 if board.current_player == X else 1
+    masks = [x, o]
+
+    root = _Node(-1, 1 - root_player, None, _free_indexes(full_mask, x | o))
+    rng.shuffle(root.untried)
+    deadline = time.monotonic() + time_limit
+
+    while time.monotonic() < deadline:
+        node = root
+        state = masks[:]
+        player = root_player
+        winner = None
+
+        # Selection
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            node = max(
+                node.children,
+                key=lambda child: child.wins / child.visits + EXPLORATION * math.sqrt(log_visits / child.visits)
+            )
+            state[player] |= 1 << node.move
+            if _completes_line(state[player], lines[node.move]):
+                winner = player
+            player = 1 - player
+
+        # Expansion
+        if winner is None and node.untried:
+            move = node.untried.pop()
+            state[player] |= 1 << move
+            child = _Node(move, player, node, [])
+            if _completes_line(state[player], lines[move]):
+                winner = player
+            else:
+                child.untried = _free_indexes(full_mask, state[0] | state[1])
+                rng.shuffle(child.untried)
+            node.children.append(child)
+            node = child
+            player = 1 - player
+
+        # Playout
+        if winner is None:
+            free = _free_indexes(full_mask, state[0] | state[1])
+            rng.shuffle(free)
+            for move in free:
+                state[player] |= 1 << move
+                if _completes_line(state[player], lines[move]):
+                    winner = player
+                    break
+                player = 1 - player
+
+        # Backpropagation; each node scores for the player who moved into it
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.wins += 0.5
+            elif winner == node.mover:
+                node.wins += 1.0
+            node = node.parent
+
+    return {child.move: (child.visits, child.wins) for child in root.children}
+
+
+class MCTSSearch:
+    """Root-parallel Monte Carlo Tree Search.
+
+    Every pool worker grows an independent UCT tree from the same position
+    until the time limit; visit counts per root move are then summed and
+    the most visited move wins. Immediate wins and forced blocks are taken
+    without searching.
+    """
+
+    def __init__(self, board: Bitboard, time_limit: float = 1.0, workers: Optional[int] = None):
+        self.board = board
+        self.time_limit = time_limit
+        self.workers = workers or MCTS_WORKERS
+        self.playouts = 0
+
+    def best_move(self) -> Optional[Tuple[int, int]]:
+        board = self.board
+        if board.is_full():
+            return None
+        me = board.current_player
+        opponent = O if me == X else X
+        for symbol in (me, opponent):
+            for row, col in board.empty_cells():
+                if board.wins_with(row, col, symbol):
+                    return (row, col)
+
+        stats = self._merge(self._run())
+        if not stats:
+            return next(board.empty_cells())
+        self.playouts = sum(visits for visits, _ in stats.values())
+        best = max(stats, key=lambda index: stats[index][0])
+        return board.cell_of(best)
+
+    def _run(self) -> List[Dict[int, Tuple[int, float]]]:
+        board = self.board
+        args = (board.size, board.win_length, board.x, board.o, self.time_limit)
+        deadline = time.monotonic() + self.time_limit
+        try:
+            pool = get_pool()
+            futures = [
+                pool.submit(run_playouts, *args, random.getrandbits(32))
+                for _ in range(self.workers)
+            ]
+        except Exception as e:
+            # No usable pool (e.g. restricted sandbox): search in-process
+            print(f"MCTS pool unavailable, searching in-process: {str(e)}")
+            return [run_playouts(*args, random.getrandbits(32))]
+
+        # Small grace period for process scheduling and result transfer
+        done, not_done = wait(futures, timeout=self.time_limit + 0.5)
+        for future in not_done:
+            future.cancel()
+        results = []
+        for future in done:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"MCTS worker error: {str(e)}")
+        if not results:
+            # No worker answered in time (e.g. the pool was still starting):
+            # search in-process rather than play an unsearched move, for
+            # what is left of the budget but at least a quarter of it
+            time_limit = max(deadline - time.monotonic(), self.time_limit / 4)
+            print(f"MCTS pool returned no playouts, searching in-process for {time_limit:.2f}s")
+            results.append(run_playouts(*args[:-1], time_limit, random.getrandbits(32)))
+        return results
+
+    @staticmethod
+    def _merge(results: List[Dict[int, Tuple[int, float]]]) -> Dict[int, Tuple[int, float]]:
+        merged: Dict[int, Tuple[int, float]] = {}
+        for result in results:
+            for index, (visits, wins) in result.items():
+                total_visits, total_wins = merged.get(index, (0, 0.0))
+                merged[index] = (total_visits + visits, total_wins + wins)
+        return merged
@@ -0,0 +1,110 @@
+"""Packed move log: all moves of a game in one small binary value.
+
+Layout: the Unix time of the last move as 4 big-endian bytes, then per
+move one byte with the cell index (row * size + col) and the seconds since
+the previous move as an unsigned LEB128 varint (0 for the first move).
+Symbols alternate starting with X, so they are not stored. A 3x3 game
+takes 4 + 2 * 9 bytes unless players take longer than two minutes per
+move. With the last time in the header, a move is appended without
+reading the moves before it.
+"""
+from datetime import datetime, timezone
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from app.engine.bitboard import X, O
+
+HEADER_SIZE = 4
+
+
+class LoggedMove(NamedTuple):
+    """A move read from a log; same fields as a moves row.
+
+    Logged moves have no row id, so id is the move number.
+    """
+    id: int
+    game_id: int
+    user_id: Optional[int]
+    row: int
+    col: int
+    symbol: str
+    move_number: int
+    created_at: datetime
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def decode(log: bytes) -> List[Tuple[int, int]]:
+    """(cell index, Unix time) of every move in a log"""
+    if not log:
+        return []
+    steps, pos = [], HEADER_SIZE
+    while pos < len(log):
+        cell = log[pos]
+        pos += 1
+        delta = shift = 0
+        while True:
+            byte = log[pos]
+            pos += 1
+            delta |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        steps.append((cell, delta))
+    # Count back from the last move to the time of the first
+    at = int.from_bytes(log[:HEADER_SIZE], "big") - sum(delta for _, delta in steps)
+    moves = []
+    for cell, delta in steps:
+        at += delta
+        moves.append((cell, at))
+    return moves
+
+
+def encode(moves: Iterable[Tuple[int, int]]) -> bytes:
+    """Inverse of decode()"""
+    out, last = bytearray(), None
+    for cell, at in moves:
+        if last is None:
+            last = int(at)
+        out.append(cell)
+        out += _varint(max(0, int(at) - last))
+        last = max(last, int(at))
+    if last is None:
+        return b""
+    return last.to_bytes(HEADER_SIZE, "big") + bytes(out)
+
+
+def append(log: Optional[bytes], cell: int, at: int) -> bytes:
+    """A log with one more move; reads only the header, not the moves"""
+    if not log:
+        return encode([(cell, at)])
+    last = int.from_bytes(log[:HEADER_SIZE], "big")
+    return max(last, at).to_bytes(HEADER_SIZE, "big") + log[HEADER_SIZE:] + bytes([cell]) + _varint(max(0, at - last))
+
+
+def logged_moves(game) -> List[LoggedMove]:
+    """Moves of a game (anything with id, board_size, players and move_log)"""
+    moves = []
+    for number, (cell, at) in enumerate(decode(game.move_log), start=1):
+        row, col = divmod(cell, game.board_size)
+        symbol = X if number % 2 else O
+        moves.append(LoggedMove(
+            id=number,
+            game_id=game.id,
+            user_id=game.player_x_id if symbol == X else game.player_o_id,
+            row=row,
+            col=col,
+            symbol=symbol,
+            move_number=number,
+            created_at=datetime.fromtimestamp(at, timezone.utc).replace(tzinfo=None),
+        ))
+    return moves
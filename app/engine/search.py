@@ -0,0 +1,254 @@
+import random
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from app.engine.bitboard import Bitboard, X
+
+WIN_SCORE = 1_000_000
+# Scores above this are forced wins/losses; they carry a ply offset
+MATE_THRESHOLD = WIN_SCORE - 1000
+
+# Transposition table entry bounds
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Node count between wall-clock checks
+_TIME_CHECK_INTERVAL = 512
+# Transposition table is cleared when it grows past this many entries
+_MAX_TABLE_SIZE = 500_000
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget is spent"""
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(size: int) -> Tuple[Tuple[int, int], ...]:
+    """Random 64-bit keys per bit index for (X, O), fixed per board size"""
+    rng = random.Random(0x5EED + size)
+    return tuple((rng.getrandbits(64), rng.getrandbits(64)) for _ in range(size * (size + 1)))
+
+
+@lru_cache(maxsize=None)
+def all_lines(size: int, win_length: int) -> Tuple[int, ...]:
+    """Every distinct win-line mask on the board"""
+    lines = set()
+    for through in Bitboard(size, win_length).lines:
+        lines.update(through)
+    return tuple(sorted(lines))
+
+
+@lru_cache(maxsize=None)
+def line_weights(win_length: int) -> Tuple[int, ...]:
+    """Heuristic weight of an unblocked line by number of own stones in it.
+
+    Powers of ten up to win length 5; longer lines use a smaller base so
+    the top weight stays at most 10000, well below WIN_SCORE.
+    """
+    base = 10 if win_length <= 5 else max(2, int(10000 ** (1 / (win_length - 1))))
+    return (0,) + tuple(base ** count for count in range(win_length))
+
+
+def zobrist_hash(board: Bitboard) -> int:
+    keys = zobrist_keys(board.size)
+    value = 0
+    for index, (key_x, key_o) in enumerate(keys):
+        bit = 1 << index
+        if board.x & bit:
+            value ^= key_x
+        elif board.o & bit:
+            value ^= key_o
+    return value
+
+
+class AlphaBetaSearch:
+    """Iterative-deepening negamax with alpha-beta pruning.
+
+    Positions are hashed with Zobrist keys into a transposition table that
+    also supplies the first move to try at each node. Search stops when
+    max_depth is reached, a forced result is found, or time_budget seconds
+    have passed; the best move of the last completed depth is returned.
+    """
+
+    def __init__(self, board: Bitboard, time_budget: float = 1.0, max_depth: int = 64):
+        self.board = board
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.size = board.size
+        self.stride = board.stride
+        self.full_mask = board.full_mask
+        self.lines = board.lines
+        self.all_lines = all_lines(board.size, board.win_length)
+        self.line_weights = line_weights(board.win_length)
+        self.keys = zobrist_keys(board.size)
+        self.table: Dict[int, Tuple[int, int, int, int]] = {}
+        self.nodes = 0
+        self.depth_reached = 0
+        self.deadline = 0.0
+
+    def best_move(self) -> Optional[Tuple[int, int]]:
+        """Best (row, col) for the side to move, or None if the board is full"""
+        board = self.board
+        if board.is_full():
+            return None
+        x_to_move = board.current_player == X
+        me, opp = (board.x, board.o) if x_to_move else (board.o, board.x)
+        player = 0 if x_to_move else 1
+        key = zobrist_hash(board)
+
+        self.deadline = time.monotonic() + self.time_budget
+        moves = self._ordered_moves(me, opp, None)
+        best = moves[0]
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, move = self._search_root(me, opp, depth, key, player, moves, best)
+            except SearchTimeout:
+                break
+            best = move
+            self.depth_reached = depth
+            if abs(score) >= MATE_THRESHOLD or depth >= self.full_mask.bit_count() - board.move_count:
+                break
+            # Try the previous best first on the next iteration
+            moves.remove(best)
+            moves.insert(0, best)
+        return board.cell_of(best)
+
+    def _search_root(self, me, opp, depth, key, player, moves, previous_best):
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best_move = previous_best
+        for index in moves:
+            score = -self._negamax(
+                opp, me | (1 << index), depth - 1, -beta, -alpha,
+                key ^ self.keys[index][player], 1 - player, index, 1
+            )
+            if score > alpha:
+                alpha, best_move = score, index
+        return alpha, best_move
+
+    def _negamax(self, me, opp, depth, alpha, beta, key, player, last, ply):
+        self.nodes += 1
+        if self.nodes % _TIME_CHECK_INTERVAL == 0 and time.monotonic() > self.deadline:
+            raise SearchTimeout()
+
+        # The opponent just played at `last`; only lines through it can be new
+        for line in self.lines[last]:
+            if opp & line == line:
+                return -WIN_SCORE + ply
+        occupied = me | opp
+        if occupied == self.full_mask:
+            return 0
+        if depth == 0:
+            return self._evaluate(me, opp)
+
+        alpha_orig = alpha
+        entry = self.table.get(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, flag, value, tt_move = entry
+            if entry_depth >= depth:
+                value = _from_table(value, ply)
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                elif flag == UPPER:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        best_value = -WIN_SCORE - 1
+        best_move = -1
+        for index in self._ordered_moves(me, opp, tt_move):
+            value = -self._negamax(
+                opp, me | (1 << index), depth - 1, -beta, -alpha,
+                key ^ self.keys[index][player], 1 - player, index, ply + 1
+            )
+            if value > best_value:
+                best_value, best_move = value, index
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                break
+
+        if best_value <= alpha_orig:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if len(self.table) >= _MAX_TABLE_SIZE:
+            self.table.clear()
+        self.table[key] = (depth, flag, _to_table(best_value, ply), best_move)
+        return best_value
+
+    def _candidates(self, me: int, opp: int) -> int:
+        """Empty cells next to any stone; the centre on an empty board.
+
+        Small boards are searched over every empty cell.
+        """
+        occupied = me | opp
+        if self.size <= 4:
+            return self.full_mask & ~occupied
+        if not occupied:
+            center = self.size // 2
+            return 1 << (center * self.stride + center)
+        stride = self.stride
+        near = occupied | (occupied << 1) | (occupied >> 1)
+        near |= (near << stride) | (near >> stride)
+        return near & self.full_mask & ~occupied
+
+    def _ordered_moves(self, me: int, opp: int, first: Optional[int]) -> List[int]:
+        """Candidate moves, best-looking first: TT move, wins, blocks, then by line potential"""
+        scored = []
+        free = self._candidates(me, opp)
+        while free:
+            low = free & -free
+            free ^= low
+            index = low.bit_length() - 1
+            score = 0
+            for line in self.lines[index]:
+                mine = line & me
+                theirs = line & opp
+                if not theirs:
+                    if (mine | low) == line:
+                        score += 1 << 40
+                    score += self.line_weights[mine.bit_count() + 1]
+                if not mine:
+                    if (theirs | low) == line:
+                        score += 1 << 30
+                    score += self.line_weights[theirs.bit_count() + 1] // 2
+            if index == first:
+                score += 1 << 50
+            scored.append((score, index))
+        scored.sort(reverse=True)
+        return [index for _, index in scored]
+
+    def _evaluate(self, me: int, opp: int) -> int:
+        """Static score of a quiet position from the side to move's view"""
+        weights = self.line_weights
+        score = 0
+        for line in self.all_lines:
+            mine = line & me
+            theirs = line & opp
+            if mine and not theirs:
+                score += weights[mine.bit_count()]
+            elif theirs and not mine:
+                score -= weights[theirs.bit_count()]
+        return score
+
+
+def _to_table(value: int, ply: int) -> int:
+    """Store forced-result scores relative to the node, not the root"""
+    if value >= MATE_THRESHOLD:
+        return value + ply
+    if value <= -MATE_THRESHOLD:
+        return value - ply
+    return value
+
+
+def _from_table(value: int, ply: int) -> int:
+    if value >= MATE_THRESHOLD:
+        return value - ply
+    if value <= -MATE_THRESHOLD:
+        return value + ply
+    return value
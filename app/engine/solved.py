@@ -0,0 +1,273 @@
+"""Perfect-play tables for small boards.
+
+Build once with ``python -m app.engine.solved`` (the Dockerfile does this).
+Every reachable, unfinished position is solved offline, reduced by the eight
+board symmetries, and written to an open-addressing hash table in a binary
+file. The bot reads it through a read-only mmap, so all worker processes
+share the same page-cache pages and a lookup is a couple of probes.
+"""
+import mmap
+import os
+import struct
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from app.engine.bitboard import Bitboard
+
+# (board_size, win_length) variants small enough to solve offline
+SOLVED_VARIANTS = ((3, 3), (4, 3), (4, 4))
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+SOLVED_TABLES_DIR = Path(os.getenv("SOLVED_TABLES_DIR", str(BASE_DIR / "data" / "solved")))
+
+MAGIC = b"TTTS"
+VERSION = 1
+# magic, version, size, win_length, reserved, capacity, count
+HEADER = struct.Struct("<4sBBBBII")
+EMPTY_KEY = 0xFFFFFFFF
+
+# Payload byte: best move (dense cell index) in the low nibble, outcome for
+# the side to move in bits 4-5
+LOSS, DRAW, WIN = 0, 1, 2
+
+
+def table_path(size: int, win_length: int) -> Path:
+    return SOLVED_TABLES_DIR / f"solved_{size}x{size}_{win_length}.bin"
+
+
+@lru_cache(maxsize=None)
+def _symmetries(size: int) -> Tuple[Tuple[int, ...], ...]:
+    """Cell permutations of the eight rotations/reflections (dense indexes)"""
+    transforms = []
+    for flip in (False, True):
+        for turns in range(4):
+            perm = []
+            for index in range(size * size):
+                row, col = divmod(index, size)
+                if flip:
+                    col = size - 1 - col
+                for _ in range(turns):
+                    row, col = col, size - 1 - row
+                perm.append(row * size + col)
+            transforms.append(tuple(perm))
+    return tuple(transforms)
+
+
+@lru_cache(maxsize=None)
+def _nibble_tables(size: int) -> Tuple[Tuple[Tuple[int, ...], ...], ...]:
+    """Per symmetry and 4-cell chunk, the permuted mask of every chunk value"""
+    cells = size * size
+    tables = []
+    for perm in _symmetries(size):
+        chunks = []
+        for start in range(0, cells, 4):
+            values = []
+            for nibble in range(16):
+                mask = 0
+                for bit in range(4):
+                    if nibble >> bit & 1 and start + bit < cells:
+                        mask |= 1 << perm[start + bit]
+                values.append(mask)
+            chunks.append(tuple(values))
+        tables.append(tuple(chunks))
+    return tuple(tables)
+
+
+def _permute(mask: int, chunks) -> int:
+    result = 0
+    shift = 0
+    for values in chunks:
+        result |= values[(mask >> shift) & 0xF]
+        shift += 4
+    return result
+
+
+def canonical(size: int, x: int, o: int) -> Tuple[int, int]:
+    """Smallest key over all symmetries and the symmetry that produces it"""
+    cells = size * size
+    best_key = None
+    best_symmetry = 0
+    for symmetry, chunks in enumerate(_nibble_tables(size)):
+        key = _permute(x, chunks) | (_permute(o, chunks) << cells)
+        if best_key is None or key < best_key:
+            best_key, best_symmetry = key, symmetry
+    return best_key, best_symmetry
+
+
+@lru_cache(maxsize=None)
+def _dense_lines(size: int, win_length: int) -> Tuple[Tuple[int, ...], ...]:
+    """Win-line masks through each dense cell index"""
+    board = Bitboard(size, win_length)
+    lines = []
+    for index in range(size * size):
+        row, col = divmod(index, size)
+        through = []
+        for line in board.lines[row * board.stride + col]:
+            dense = 0
+            for cell in range(size * size):
+                r, c = divmod(cell, size)
+                if line >> (r * board.stride + c) & 1:
+                    dense |= 1 << cell
+            through.append(dense)
+        lines.append(tuple(through))
+    return tuple(lines)
+
+
+class _Solver:
+    """Exhaustive negamax over canonical positions with memoization"""
+
+    def __init__(self, size: int, win_length: int):
+        self.size = size
+        self.cells = size * size
+        self.full = (1 << self.cells) - 1
+        self.lines = _dense_lines(size, win_length)
+        self.scores: Dict[int, int] = {}
+        self.payloads: Dict[int, int] = {}
+
+    def solve(self, me: int, opp: int, x_to_move: bool) -> int:
+        """Score for the side to move: positive wins, higher is faster"""
+        x, o = (me, opp) if x_to_move else (opp, me)
+        key, _ = canonical(self.size, x, o)
+        score = self.scores.get(key)
+        if score is not None:
+            return score
+
+        # Work in the canonical orientation so the stored move matches the key
+        x = key & self.full
+        o = key >> self.cells
+        me, opp = (x, o) if x_to_move else (o, x)
+        remaining = self.cells - (me | opp).bit_count()
+        best_score = None
+        best_move = 0
+        for index in range(self.cells):
+            bit = 1 << index
+            if (me | opp) & bit:
+                continue
+            mine = me | bit
+            if any(mine & line == line for line in self.lines[index]):
+                score = remaining
+            elif remaining == 1:
+                score = 0
+            else:
+                score = -self.solve(opp, mine, not x_to_move)
+            if best_score is None or score > best_score:
+                best_score, best_move = score, index
+
+        self.scores[key] = best_score
+        outcome = WIN if best_score > 0 else LOSS if best_score < 0 else DRAW
+        self.payloads[key] = best_move | (outcome << 4)
+        return best_score
+
+
+def build_table(size: int, win_length: int, path: Optional[Path] = None) -> int:
+    """Solve a variant and write its table; returns the number of positions"""
+    solver = _Solver(size, win_length)
+    solver.solve(0, 0, True)
+    payloads = solver.payloads
+
+    count = len(payloads)
+    capacity = 1
+    while capacity < count * 2:
+        capacity <<= 1
+    bits = capacity.bit_length() - 1
+    keys = [EMPTY_KEY] * capacity
+    values = bytearray(capacity)
+    for key, payload in payloads.items():
+        slot = _slot(key, bits)
+        while keys[slot] != EMPTY_KEY:
+            slot = (slot + 1) & (capacity - 1)
+        keys[slot] = key
+        values[slot] = payload
+
+    path = path or table_path(size, win_length)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, size, win_length, 0, capacity, count))
+        f.write(struct.pack(f"<{capacity}I", *keys))
+        f.write(values)
+    os.replace(tmp_path, path)
+    return count
+
+
+def _slot(key: int, bits: int) -> int:
+    """Fibonacci hashing of a 32-bit key into 2**bits slots"""
+    return ((key * 0x9E3779B1) & 0xFFFFFFFF) >> (32 - bits) if bits else 0
+
+
+class SolvedTable:
+    """Read-only view of a table file through mmap"""
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size, win_length, _, capacity, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a solved table: {path}")
+        self.size = size
+        self.win_length = win_length
+        self.capacity = capacity
+        self.count = count
+        self._bits = capacity.bit_length() - 1
+        self._keys_offset = HEADER.size
+        self._values_offset = HEADER.size + capacity * 4
+
+    def lookup(self, board: Bitboard) -> Optional[Tuple[Tuple[int, int], int]]:
+        """((row, col), outcome) for the side to move, or None if not stored"""
+        size = self.size
+        x = _dense(board.x, size, board.stride)
+        o = _dense(board.o, size, board.stride)
+        key, symmetry = canonical(size, x, o)
+        slot = _slot(key, self._bits)
+        mask = self.capacity - 1
+        for _ in range(self.capacity):
+            (stored,) = struct.unpack_from("<I", self._mmap, self._keys_offset + slot * 4)
+            if stored == key:
+                payload = self._mmap[self._values_offset + slot]
+                # Map the canonical-frame move back onto the real board
+                move = _symmetries(size)[symmetry].index(payload & 0xF)
+                return divmod(move, size), payload >> 4
+            if stored == EMPTY_KEY:
+                return None
+            slot = (slot + 1) & mask
+        return None
+
+
+def _dense(mask: int, size: int, stride: int) -> int:
+    """Drop the bitboard padding column: bit row*stride+col -> row*size+col"""
+    dense = 0
+    row_mask = (1 << size) - 1
+    for row in range(size):
+        dense |= ((mask >> (row * stride)) & row_mask) << (row * size)
+    return dense
+
+
+_tables: Dict[Tuple[int, int], Optional[SolvedTable]] = {}
+_tables_lock = threading.Lock()
+
+
+def get_table(size: int, win_length: int) -> Optional[SolvedTable]:
+    """Mapped table for a variant, or None if it was not built"""
+    variant = (size, win_length)
+    with _tables_lock:
+        if variant not in _tables:
+            path = table_path(size, win_length)
+            _tables[variant] = SolvedTable(path) if variant in SOLVED_VARIANTS and path.exists() else None
+        return _tables[variant]
+
+
+def solved_move(board: Bitboard) -> Optional[Tuple[int, int]]:
+    """Perfect-play move from the prebuilt table, if one covers this board"""
+    table = get_table(board.size, board.win_length)
+    if table is None:
+        return None
+    result = table.lookup(board)
+    return result[0] if result else None
+
+
+if __name__ == "__main__":
+    for size, win_length in SOLVED_VARIANTS:
+        count = build_table(size, win_length)
+        print(f"{size}x{size}, win {win_length}: {count} positions -> {table_path(size, win_length)}")
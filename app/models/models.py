@@ -1,8 +1,18 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Enum, LargeBinary, Index, JSON, Float, text
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
+
 from app.database.db import Base
+from app.engine.move_log import logged_moves
+
+# SQLite keeps datetimes as text. Bound values are written the way
+# CURRENT_TIMESTAMP writes them, to the second, so both sort together
+Timestamp = DateTime().with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite"
+)
 
 class GameStatus(enum.Enum):
     IN_PROGRESS = "in_progress"
@@ -10,6 +20,12 @@ class GameStatus(enum.Enum):
     O_WON = "o_won"
     DRAW = "draw"
 
+class BotDifficulty(enum.Enum):
+    EASY = "easy"
+    MEDIUM = "medium"
+    HARD = "hard"
+    EXPERT = "expert"
+
 class User(Base):
     __tablename__ = "users"
 
@@ -19,7 +35,7 @@ class User(Base):
     hashed_password = Column(String(255))
     is_active = Column(Boolean, default=True)
     is_bot = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=func.now())
+    created_at = Column(Timestamp, default=func.now())
     
     # Relationships
     games_as_player_x = relationship("Game", back_populates="player_x", foreign_keys="Game.player_x_id")
@@ -34,16 +50,51 @@ class Game(Base):
     status = Column(String(20), default=GameStatus.IN_PROGRESS.value)
     winner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     is_bot_game = Column(Boolean, default=False)
+    # Games brought in through the import API; their results are taken on
+    # the importer's word, so they never count towards stats or ratings
+    is_imported = Column(Boolean, default=False)
+    bot_difficulty = Column(String(10), default=BotDifficulty.MEDIUM.value)
     board_size = Column(Integer, default=3)
     win_length = Column(Integer, default=3)
-    created_at = Column(DateTime, default=func.now())
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    # Board snapshot kept in step with the moves table (see Bitboard.pack)
+    board = Column(LargeBinary, nullable=True)
+    move_count = Column(Integer, default=0)
+    current_player = Column(String(1), default="X")
+    # Packed move log (see app.engine.move_log) for games stored with
+    # MOVE_STORAGE=packed; NULL for games whose moves are rows in moves
+    move_log = Column(LargeBinary, nullable=True)
+    created_at = Column(Timestamp, default=func.now())
+    updated_at = Column(Timestamp, default=func.now(), onupdate=func.now())
     
     # Relationships
     player_x = relationship("User", back_populates="games_as_player_x", foreign_keys=[player_x_id])
     player_o = relationship("User", back_populates="games_as_player_o", foreign_keys=[player_o_id])
     moves = relationship("Move", back_populates="game", cascade="all, delete-orphan")
     
+    @property
+    def move_history(self):
+        """The game's moves from whichever layout it uses (read by GameResponse)"""
+        if self.move_log is not None:
+            return logged_moves(self)
+        return self.moves
+    
+    __table_args__ = (
+        # A player's games, newest first
+        Index("ix_games_player_x_created", "player_x_id", "created_at", "id"),
+        Index("ix_games_player_o_created", "player_o_id", "created_at", "id"),
+        # Lobby: open games waiting for player O. Partial where supported;
+        # MySQL gets the plain (status, created_at) index
+        Index(
+            "ix_games_open", "status", "created_at",
+            sqlite_where=text("player_o_id IS NULL"),
+            postgresql_where=text("player_o_id IS NULL")
+        ),
+    )
+    # Optimistic locking: every UPDATE/DELETE of a game is guarded by the
+    # move count it was read with, so of two moves built on the same board
+    # only the first to commit succeeds. The controllers bump it themselves
+    __mapper_args__ = {"version_id_col": move_count, "version_id_generator": False}
+    
 class Move(Base):
     __tablename__ = "moves"
 
@@ -54,8 +105,32 @@ class Move(Base):
     col = Column(Integer)  # 0, 1, or 2
     symbol = Column(String(1))  # "X" or "O"
     move_number = Column(Integer)  # The sequence number of the move
-    created_at = Column(DateTime, default=func.now())
+    created_at = Column(Timestamp, default=func.now())
     
     # Relationships
     game = relationship("Game", back_populates="moves")
-    user = relationship("User") 
\ No newline at end of file
+    user = relationship("User")
+    
+    __table_args__ = (
+        # One row per move number; also serves every per-game move lookup
+        Index("ix_moves_game_move", "game_id", "move_number", unique=True),
+    ) 
+
+class UserStats(Base):
+    """Per-user results, updated in the transaction that finishes a game"""
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    games = Column(Integer, default=0, nullable=False)
+    wins = Column(Integer, default=0, nullable=False)
+    losses = Column(Integer, default=0, nullable=False)
+    draws = Column(Integer, default=0, nullable=False)
+    # Wins in a row if positive, losses in a row if negative; a draw resets it
+    current_streak = Column(Integer, default=0, nullable=False)
+    best_win_streak = Column(Integer, default=0, nullable=False)
+    # {"<board_size>": {"games": n, "wins": n, "losses": n, "draws": n}}
+    by_board_size = Column(JSON, default=dict, nullable=False)
+    # Elo rating (see stats_controller.update_ratings)
+    rating = Column(Float, default=1200.0, nullable=False, index=True)
+    # Indexed so the leaderboard can pull only the rows changed since its last sync
+    updated_at = Column(Timestamp, default=func.now(), onupdate=func.now(), index=True)
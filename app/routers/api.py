@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.database.db import get_db
-from app.schemas.schemas import GameResponse, MoveCreate, MoveResponse, GameBoard
+from app.schemas.schemas import GameResponse, GameSummary, MoveCreate, MoveResponse, GameBoard
 from app.controllers.game_controller import (
-    create_game, get_game, get_user_games, join_game, 
-    make_move, get_board_state, get_game_with_board
+    create_game, get_game, get_user_games_page, join_game, 
+    make_move, get_board_state, get_game_with_board,
+    board_etag, game_etag, etag_matches, wait_for_move,
+    LONG_POLL_TIMEOUT, LONG_POLL_MAX_TIMEOUT, MAX_PAGE_SIZE
 )
 from app.controllers.auth import get_current_active_user
 from app.models.models import User
@@ -20,29 +23,72 @@ router = APIRouter(
 # Games API endpoints
 @router.get("/games", response_model=List[GameResponse])
 def read_user_games(
+    response: Response,
+    cursor: Optional[str] = None,
     skip: int = 0, 
-    limit: int = 100, 
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE), 
     db: Session = Depends(get_db), 
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all games for current user"""
-    return get_user_games(db, user_id=current_user.id, skip=skip, limit=limit)
+    """Get games for current user with their moves, newest first.
+    
+    Keyset-paginated: pass the X-Next-Cursor response header back as cursor.
+    """
+    games, next_cursor = get_user_games_page(db, current_user.id, limit, cursor, skip)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return games
+
+@router.get("/games/summary", response_model=List[GameSummary])
+def read_user_game_summaries(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE), 
+    db: Session = Depends(get_db), 
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get games for current user without moves, newest first (keyset-paginated)"""
+    games, next_cursor = get_user_games_page(db, current_user.id, limit, cursor, summary=True)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return games
 
 @router.get("/games/{game_id}", response_model=GameResponse)
-def read_game(
+async def read_game(
     game_id: int, 
+    request: Request,
+    response: Response,
+    wait_for_move_after: Optional[int] = None,
+    timeout: float = Query(LONG_POLL_TIMEOUT, gt=0, le=LONG_POLL_MAX_TIMEOUT),
     db: Session = Depends(get_db)
 ):
-    """Get game by ID"""
-    return get_game(db, game_id=game_id)
+    """Get game by ID (supports If-None-Match and long-polling)"""
+    if wait_for_move_after is not None:
+        await wait_for_move(db, game_id, wait_for_move_after, timeout)
+    game = await run_in_threadpool(get_game, db, game_id)
+    etag = game_etag(game)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return await run_in_threadpool(GameResponse.model_validate, game)
 
 @router.get("/games/{game_id}/board", response_model=GameBoard)
-def read_game_board(
+async def read_game_board(
     game_id: int, 
+    request: Request,
+    response: Response,
+    wait_for_move_after: Optional[int] = None,
+    timeout: float = Query(LONG_POLL_TIMEOUT, gt=0, le=LONG_POLL_MAX_TIMEOUT),
     db: Session = Depends(get_db)
 ):
-    """Get game board state"""
-    return get_game_with_board(db, game_id=game_id)
+    """Get game board state (supports If-None-Match and long-polling)"""
+    if wait_for_move_after is not None:
+        await wait_for_move(db, game_id, wait_for_move_after, timeout)
+    etag = await run_in_threadpool(board_etag, db, game_id)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return await run_in_threadpool(get_game_with_board, db, game_id)
 
 @router.post("/games/{game_id}/join", response_model=GameResponse)
 def join_existing_game(
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.database.db import get_db
+from app.schemas.schemas import LeaderboardResponse
+from app.controllers.leaderboard import get_leaderboard, LEADERBOARD_MAX_LIMIT
+from app.controllers.auth import get_current_active_user
+from app.models.models import User
+
+router = APIRouter(
+    prefix="/leaderboard",
+    tags=["leaderboard"],
+    dependencies=[Depends(get_current_active_user)]
+)
+
+@router.get("/", response_model=LeaderboardResponse)
+def read_leaderboard(
+    limit: int = Query(10, ge=1, le=LEADERBOARD_MAX_LIMIT),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Get the top rated players and the current user's rank"""
+    return get_leaderboard(db, current_user.id, limit)
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends
+
+from app.controllers.auth import get_current_active_user, token_cache
+from app.controllers.game_controller import board_cache
+from app.controllers.bot_scheduler import bot_scheduler
+from app.controllers.game_hub import game_hub
+from app.controllers.game_watcher import game_watcher
+from app.controllers.password_hasher import password_hasher
+from app.controllers.leaderboard import leaderboard
+
+router = APIRouter(
+    prefix="/stats",
+    tags=["stats"],
+    dependencies=[Depends(get_current_active_user)]
+)
+
+@router.get("/cache")
+def read_cache_stats():
+    """Get hit, miss and eviction counters of the in-process caches"""
+    return {"board_cache": board_cache.stats(), "token_cache": token_cache.stats()}
+
+@router.get("/bot-queue")
+def read_bot_queue_stats():
+    """Get depth, outcome counters and latency of the background bot queue"""
+    return bot_scheduler.stats()
+
+@router.get("/live")
+def read_live_stats():
+    """Get subscriber and event counters of the WebSocket hub and the game watcher"""
+    return {**game_hub.stats(), "watcher": game_watcher.stats()}
+
+@router.get("/auth")
+def read_auth_stats():
+    """Get load and latency histograms of the password hashing pool"""
+    return password_hasher.stats()
+
+@router.get("/leaderboard")
+def read_leaderboard_stats():
+    """Get size and sync counters of the in-memory leaderboard"""
+    return leaderboard.stats()
@@ -1,43 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Form, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 import json
 
-from app.database.db import get_db
+from app.database.db import get_async_db
 from app.views.templates import render_template
-from app.controllers.auth import authenticate_user, create_access_token, get_current_user
-from app.controllers.user_controller import create_user
-from app.controllers.game_controller import (
-    create_game, get_game, get_user_games, join_game, 
-    make_move, get_board_state, get_game_with_board, create_bot_game, handle_bot_move
+from app.controllers.auth import create_access_token
+from app.controllers.async_auth import authenticate_user, get_current_user
+from app.controllers.async_user_controller import create_user, get_or_create_user
+from app.controllers.bot_scheduler import bot_scheduler
+from app.controllers.stats_controller import get_user_stats_async
+from app.controllers.async_game_controller import (
+    create_game, get_game, get_user_games, get_user_games_page, get_open_games, join_game,
+    make_move_with_bot_reply, get_bitboard, get_game_with_board, create_bot_game, delete_game as remove_game
 )
 from app.schemas.schemas import UserCreate, GameCreate
-from app.models.models import User, Move, Game, GameStatus
+from app.models.models import User, Game
 
+# Every route here runs on the event loop, so all database access goes
+# through the AsyncSession and the async controllers
 router = APIRouter(tags=["web"])
 
-# Функция для получения или создания специального пользователя
-def get_or_create_special_user(db: Session, username: str) -> User:
-    """Get or create a special user (bot, player1, player2)"""
-    special_user = db.query(User).filter(User.username == username).first()
-    if not special_user:
-        special_user = User(
-            username=username,
-            email=f"{username}@example.com",
-            hashed_password="not_used",
-            is_active=True,
-            is_bot=username == "bot"  # только бот имеет флаг is_bot=True
-        )
-        db.add(special_user)
-        db.commit()
-        db.refresh(special_user)
-    return special_user
+# Games per page on the game list
+GAMES_PAGE_SIZE = 50
+
+def is_special_game(game: Game) -> bool:
+    """Whether player O is Player 1 or Player 2 (one user plays both sides)"""
+    return game.player_o is not None and game.player_o.username in ["player1", "player2"]
+
+def count_moves(board) -> int:
+    """Number of occupied cells on a list-of-lists board"""
+    return sum(cell is not None for row in board for cell in row)
 
 # Home page
 @router.get("/", response_class=HTMLResponse)
-async def home(request: Request, db: Session = Depends(get_db)):
+async def home(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Home page"""
     # Try to get current user
     user = None
@@ -49,7 +49,7 @@ async def home(request: Request, db: Session = Depends(get_db)):
     # Get latest games for display
     latest_games = []
     if user:
-        latest_games = get_user_games(db, user.id, limit=5)
+        latest_games = await get_user_games(db, user.id, limit=5)
     
     return render_template(
         request, 
@@ -73,7 +73,7 @@ async def register_user(
     email: str = Form(...),
     password: str = Form(...),
     confirm_password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Register new user"""
     errors = {}
@@ -86,7 +86,7 @@ async def register_user(
     if not errors:
         try:
             user_create = UserCreate(username=username, email=email, password=password)
-            user = create_user(db, user_create)
+            user = await create_user(db, user_create)
             
             # Create JWT token and set cookie
             access_token = create_access_token(data={"sub": user.username})
@@ -121,10 +121,21 @@ async def login_user(
     request: Request,
     username: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login user"""
-    user = authenticate_user(db, username, password)
+    try:
+        user = await authenticate_user(db, username, password)
+    except HTTPException as e:
+        # The password hashing pool is saturated
+        return render_template(
+            request, 
+            "login.html", 
+            {
+                "error": e.detail,
+                "username": username
+            }
+        )
     if not user:
         return render_template(
             request, 
@@ -164,19 +175,20 @@ async def logout():
 @router.get("/games", response_class=HTMLResponse)
 async def games_list(
     request: Request,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Game list page"""
     try:
         user = await get_current_user(db, request.cookies.get("access_token"))
-        games = get_user_games(db, user.id)
+        try:
+            games, next_cursor = await get_user_games_page(db, user.id, GAMES_PAGE_SIZE, cursor)
+        except HTTPException:
+            # Испорченный курсор - показываем первую страницу
+            games, next_cursor = await get_user_games_page(db, user.id, GAMES_PAGE_SIZE)
         
         # Получаем список открытых игр, к которым можно присоединиться
-        open_games = db.query(Game).filter(
-            Game.player_o_id == None,  # Игры без второго игрока
-            Game.player_x_id != user.id,  # Не созданные текущим пользователем
-            Game.status == GameStatus.IN_PROGRESS.value  # Только активные игры
-        ).order_by(Game.created_at.desc()).all()
+        open_games = await get_open_games(db, user.id)
         
         return render_template(
             request, 
@@ -184,6 +196,7 @@ async def games_list(
             {
                 "user": user,
                 "games": games,
+                "next_cursor": next_cursor,
                 "open_games": open_games
             }
         )
@@ -194,19 +207,19 @@ async def games_list(
 @router.get("/games/new", response_class=HTMLResponse)
 async def new_game_form(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """New game form page"""
     try:
         user = await get_current_user(db, request.cookies.get("access_token"))
         
         # Get list of users for opponent selection, исключая бота и специальных пользователей
-        users = db.query(User).filter(
+        users = (await db.scalars(select(User).where(
             User.id != user.id,
             User.username != "bot",
             User.username != "player1",
             User.username != "player2"
-        ).all()
+        ))).all()
         
         return render_template(
             request, 
@@ -225,7 +238,8 @@ async def create_new_game(
     player_o_id: Optional[str] = Form(None),
     board_size: int = Form(3),
     win_length: int = Form(3),
-    db: Session = Depends(get_db)
+    bot_difficulty: str = Form("medium"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create new game"""
     try:
@@ -239,12 +253,12 @@ async def create_new_game(
         if player_o_id:
             if player_o_id == "player1":
                 # Создаем игру с Player 1
-                special_user = get_or_create_special_user(db, "player1")
+                special_user = await get_or_create_user(db, "player1")
                 numeric_player_o_id = special_user.id
                 is_bot = False
             elif player_o_id == "player2":
                 # Создаем игру с Player 2
-                special_user = get_or_create_special_user(db, "player2")
+                special_user = await get_or_create_user(db, "player2")
                 numeric_player_o_id = special_user.id
                 is_bot = False
             elif player_o_id == "bot":
@@ -266,10 +280,13 @@ async def create_new_game(
         )
         
         if is_bot:
-            game = create_bot_game(db, user.id, board_size=board_size, win_length=win_length)
+            game = await create_bot_game(
+                db, user.id, board_size=board_size, win_length=win_length,
+                bot_difficulty=bot_difficulty
+            )
             print(f"Created bot game with ID {game.id}, is_bot_game={game.is_bot_game}, board_size={game.board_size}, win_length={game.win_length}")
         else:
-            game = create_game(db=db, game=game_create, current_user_id=user.id)
+            game = await create_game(db=db, game=game_create, current_user_id=user.id)
         
         return RedirectResponse(
             url=f"/games/{game.id}", 
@@ -290,22 +307,20 @@ async def create_new_game(
 async def game_detail(
     request: Request,
     game_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Game detail page"""
     try:
         user = await get_current_user(db, request.cookies.get("access_token"))
         
         # Get game and board state
-        game = get_game(db, game_id)
-        gameboard = get_game_with_board(db, game_id)
+        game = await get_game(db, game_id)
+        gameboard = await get_game_with_board(db, game_id, game)
+        # A bot reply lost with a failed job or a restarted worker is queued again
+        bot_scheduler.resume(game)
         
         # Проверяем, играет ли пользователь против специального игрока (Player 1 или Player 2)
-        is_special_opponent = False
-        if game.player_o_id:
-            opponent = db.query(User).filter(User.id == game.player_o_id).first()
-            if opponent and opponent.username in ["player1", "player2"]:
-                is_special_opponent = True
+        is_special_opponent = is_special_game(game)
         
         # Determine if current user can play
         can_play = False
@@ -327,6 +342,7 @@ async def game_detail(
                 "game": game,
                 "board": gameboard.board,
                 "current_player": gameboard.current_player,
+                "move_count": count_moves(gameboard.board),
                 "can_play": can_play,
                 "is_special_opponent": is_special_opponent
             }
@@ -339,14 +355,14 @@ async def game_detail(
 async def join_existing_game(
     request: Request,
     game_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Join existing game"""
     try:
         user = await get_current_user(db, request.cookies.get("access_token"))
         
         # Join game
-        game = join_game(db, game_id, user.id)
+        game = await join_game(db, game_id, user.id)
         
         return RedirectResponse(url=f"/games/{game.id}", status_code=status.HTTP_303_SEE_OTHER)
     except HTTPException as e:
@@ -360,27 +376,24 @@ async def join_existing_game(
 
 # User profile page
 @router.get("/users/me", response_class=HTMLResponse)
-async def user_profile(request: Request, db: Session = Depends(get_db)):
+async def user_profile(request: Request, db: AsyncSession = Depends(get_async_db)):
     """User profile page"""
     try:
         user = await get_current_user(db, request.cookies.get("access_token"))
         
-        # Get user's game statistics
-        games = get_user_games(db, user.id)
-        total_games = len(games)
-        wins = len([g for g in games if g.winner_id == user.id])
-        draws = len([g for g in games if g.status == "draw"])
-        losses = len([g for g in games if g.status in ["x_won", "o_won"] and g.winner_id != user.id])
+        # Get user's game statistics (one row, kept up to date by make_move)
+        stats = await get_user_stats_async(db, user.id)
         
         return render_template(
             request, 
             "profile.html", 
             {
                 "user": user,
-                "total_games": total_games,
-                "wins": wins,
-                "draws": draws,
-                "losses": losses
+                "total_games": stats.games,
+                "wins": stats.wins,
+                "draws": stats.draws,
+                "losses": stats.losses,
+                "stats": stats
             }
         )
     except:
@@ -390,23 +403,20 @@ async def user_profile(request: Request, db: Session = Depends(get_db)):
 async def delete_game(
     request: Request,
     game_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a game and its moves"""
     try:
         user = await get_current_user(db, request.cookies.get("access_token"))
-        game = get_game(db, game_id)
+        game = await get_game(db, game_id)
         
         # Check if user is part of the game
         if user.id != game.player_x_id and user.id != game.player_o_id:
             raise HTTPException(status_code=403, detail="You are not part of this game")
         
-        # Delete all moves
-        db.query(Move).filter(Move.game_id == game_id).delete()
-        
-        # Delete the game
-        db.delete(game)
-        db.commit()
+        # Delete the game and all its moves
+        await remove_game(db, game)
+        bot_scheduler.cancel(game_id)
         
         # Get referer to return to the page from which the delete was initiated
         referer = request.headers.get("referer", "/games")
@@ -425,7 +435,7 @@ async def delete_game(
 async def make_game_move(
     request: Request,
     game_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Make a move in the game from web interface"""
     try:
@@ -437,16 +447,11 @@ async def make_game_move(
         col = int(form_data.get("col"))
         
         # Получаем игру и текущее состояние доски
-        game = get_game(db, game_id)
-        board, move_count = get_board_state(db, game_id)
-        current_player = "X" if move_count % 2 == 0 else "O"
+        game = await get_game(db, game_id)
+        current_player = (await get_bitboard(db, game)).current_player
         
         # Проверяем, играет ли пользователь против специального игрока (Player 1 или Player 2)
-        is_special_opponent = False
-        if game.player_o_id:
-            opponent = db.query(User).filter(User.id == game.player_o_id).first()
-            if opponent and opponent.username in ["player1", "player2"]:
-                is_special_opponent = True
+        is_special_opponent = is_special_game(game)
         
         # Определяем, кто делает ход
         move_user_id = user.id
@@ -457,20 +462,13 @@ async def make_game_move(
             else:
                 move_user_id = game.player_o_id
         
-        # Make the move
-        move = make_move(db, game_id, move_user_id, row, col)
-        
-        # If it's a bot game, let the bot make a move
-        game = get_game(db, game_id)
-        if game.is_bot_game and game.status == "in_progress":
-            try:
-                bot_move = handle_bot_move(db, game_id)
-                # Commit changes to ensure bot move is saved
-                if bot_move:
-                    db.commit()
-            except Exception as bot_error:
-                print(f"Bot move error: {str(bot_error)}")
-                # Continue game flow even if bot move failed
+        # Make the move; in a bot game the bot replies in the same commit
+        move, reply = await make_move_with_bot_reply(db, game_id, move_user_id, row, col)
+        
+        # Replies that need the full search are made in the background; the
+        # game page keeps refreshing until that move is committed
+        if game.is_bot_game and reply is None and game.status == "in_progress":
+            bot_scheduler.schedule(game_id, move.move_number)
         
         return RedirectResponse(
             url=f"/games/{game_id}", 
@@ -478,15 +476,12 @@ async def make_game_move(
         )
     except Exception as e:
         # Get game and board state for rendering with error
-        game = get_game(db, game_id)
-        gameboard = get_game_with_board(db, game_id)
+        await db.rollback()
+        game = await get_game(db, game_id)
+        gameboard = await get_game_with_board(db, game_id, game)
         
         # Проверяем, играет ли пользователь против специального игрока (Player 1 или Player 2)
-        is_special_opponent = False
-        if game.player_o_id:
-            opponent = db.query(User).filter(User.id == game.player_o_id).first()
-            if opponent and opponent.username in ["player1", "player2"]:
-                is_special_opponent = True
+        is_special_opponent = is_special_game(game)
         
         # Determine if current user can play
         can_play = False
@@ -507,6 +502,7 @@ async def make_game_move(
                 "game": game,
                 "board": gameboard.board,
                 "current_player": gameboard.current_player,
+                "move_count": count_moves(gameboard.board),
                 "can_play": can_play,
                 "is_special_opponent": is_special_opponent,
                 "error": str(e)
@@ -0,0 +1,63 @@
+import asyncio
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+
+from app.database.db import AsyncSessionLocal
+from app.controllers.async_auth import get_current_user
+from app.controllers.async_game_controller import get_game, get_cached_board
+from app.controllers.game_hub import game_hub
+from app.controllers.bot_scheduler import bot_scheduler
+from app.models.models import GameStatus
+
+router = APIRouter(tags=["websocket"])
+
+@router.websocket("/ws/games/{game_id}")
+async def game_updates(websocket: WebSocket, game_id: int):
+    """Push board deltas for a game as moves and joins are committed"""
+    # Subscribed before the state is read, so a move committed in between
+    # is not missed
+    queue = game_hub.subscribe(game_id)
+    try:
+        async with AsyncSessionLocal() as db:
+            # Authenticate with the same cookie the web pages use
+            await get_current_user(db, websocket.cookies.get("access_token"))
+            game = await get_game(db, game_id)
+            board, game_status = await get_cached_board(db, game_id, game)
+        # The game watcher relays anything newer than this from other workers
+        game_hub.observe(game_id, move_count=board.move_count, joined=game.player_o_id is not None)
+        # A bot reply lost with a failed job or a restarted worker is queued again
+        bot_scheduler.resume(game)
+    except Exception:
+        game_hub.unsubscribe(game_id, queue)
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept()
+    receiver = asyncio.create_task(_wait_for_disconnect(websocket))
+    try:
+        # Current state first, so clients can detect moves they missed
+        await websocket.send_json({
+            "type": "state",
+            "board": board.to_rows(),
+            "move_count": board.move_count,
+            "status": game_status,
+            "current_player": board.current_player if game_status == GameStatus.IN_PROGRESS.value else None,
+        })
+        while True:
+            getter = asyncio.create_task(queue.get())
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                getter.cancel()
+                break
+            await websocket.send_json(getter.result())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        game_hub.unsubscribe(game_id, queue)
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    """Read and discard client messages until the socket closes"""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import AliasChoices, BaseModel, EmailStr, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 import re
@@ -81,14 +81,67 @@ class GameResponse(GameBase):
     player_x_id: int
     status: str
     winner_id: Optional[int] = None
+    # Set for bot games; NULL on human games and on rows older than the column
+    bot_difficulty: Optional[str] = None
     created_at: datetime
     updated_at: datetime
-    moves: List[MoveResponse] = []
+    # Game.move_history covers both move layouts (rows and packed log)
+    moves: List[MoveResponse] = Field(default=[], validation_alias=AliasChoices("move_history", "moves"))
     
     class Config:
         from_attributes = True
 
+class GameSummary(GameBase):
+    """A game without its moves, for list views"""
+    id: int
+    player_x_id: int
+    status: str
+    winner_id: Optional[int] = None
+    bot_difficulty: Optional[str] = None
+    move_count: Optional[int] = 0
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class GameImport(BaseModel):
+    """A game in compact move-list notation"""
+    player_x_id: int
+    player_o_id: int
+    board_size: int = Field(default=3, ge=3, le=10)
+    win_length: int = Field(default=3, ge=3, le=5)
+    # Cells in play order, column letter then row number: "b2 a1 c3" or "b2a1c3"
+    moves: str = Field(default="", max_length=400)
+    created_at: Optional[datetime] = None
+
+class GameImportRequest(BaseModel):
+    games: List[GameImport] = Field(..., max_length=10000)
+
+class GameImportError(BaseModel):
+    index: int
+    detail: str
+
+class GameImportResponse(BaseModel):
+    imported: int
+    game_ids: List[int]
+    errors: List[GameImportError]
+    seconds: float
+    games_per_second: float
+
 class GameBoard(BaseModel):
     board: List[List[Optional[str]]]
     status: str
-    current_player: Optional[str] = None 
\ No newline at end of file
+    current_player: Optional[str] = None
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    username: Optional[str] = None
+    rating: float
+    games: int
+
+class LeaderboardResponse(BaseModel):
+    total: int
+    top: List[LeaderboardEntry]
+    me: Optional[LeaderboardEntry] = None
@@ -1,21 +1,23 @@
 // Функция инициализации игры
 function initGame() {
-    // Проверка наличия автообновления
     var gameStatus = document.getElementById('game-status');
     var canPlay = document.getElementById('can-play');
-    
+
     if (gameStatus && canPlay) {
         var status = gameStatus.value;
         var playable = canPlay.value === 'True';
-        
-        // Если игра в процессе и игрок не может ходить - настраиваем автообновление
+
+        // Если игра в процессе и игрок не может ходить - ждем ход соперника
         if (status === 'in_progress' && !playable) {
-            setTimeout(function() {
-                window.location.reload();
-            }, 2000);
+            if (!connectLiveUpdates()) {
+                // Без WebSocket возвращаемся к периодическому обновлению
+                setTimeout(function() {
+                    window.location.reload();
+                }, 2000);
+            }
         }
     }
-    
+
     // Добавляем класс активного элемента при клике
     var buttons = document.querySelectorAll('.cell-button');
     if (buttons) {
@@ -27,5 +29,70 @@ function initGame() {
     }
 }
 
+// Подписка на ходы через WebSocket: доска обновляется на месте,
+// страница перезагружается только когда ход переходит к нам или игра окончена
+function connectLiveUpdates() {
+    if (!window.WebSocket) {
+        return false;
+    }
+
+    var gameId = document.getElementById('game-id').value;
+    var moveCount = parseInt(document.getElementById('move-count').value, 10);
+    var mySymbols = document.getElementById('my-symbols').value;
+    var protocol = window.location.protocol === 'https:' ? 'wss://' : 'ws://';
+    var socket = new WebSocket(protocol + window.location.host + '/ws/games/' + gameId);
+    var reloading = false;
+
+    function reload() {
+        if (!reloading) {
+            reloading = true;
+            window.location.reload();
+        }
+    }
+
+    socket.onmessage = function(message) {
+        var event = JSON.parse(message.data);
+
+        if (event.type === 'state') {
+            // Пропустили ходы между рендером страницы и подключением
+            if (event.move_count !== moveCount || event.status !== 'in_progress') {
+                reload();
+            }
+        } else if (event.type === 'move') {
+            drawMove(event.row, event.col, event.symbol);
+            moveCount = event.move_number;
+            if (event.status !== 'in_progress' || mySymbols.indexOf(event.current_player) !== -1) {
+                reload();
+            }
+        } else {
+            // Присоединился соперник или нужна полная синхронизация
+            reload();
+        }
+    };
+
+    socket.onclose = function() {
+        // Соединение потеряно - продолжаем обновлением страницы
+        if (!reloading) {
+            setTimeout(reload, 2000);
+        }
+    };
+
+    return true;
+}
+
+// Рисует символ в клетке так же, как шаблон game.html
+function drawMove(row, col, symbol) {
+    var cell = document.getElementById('cell-' + row + '-' + col);
+    if (!cell) {
+        return;
+    }
+    var span = document.createElement('span');
+    span.className = 'position-absolute top-50 start-50 translate-middle fs-1 fw-bold ' +
+        (symbol === 'X' ? 'text-primary' : 'text-danger');
+    span.textContent = symbol;
+    cell.innerHTML = '';
+    cell.appendChild(span);
+}
+
 // Запускаем инициализацию после загрузки страницы
-document.addEventListener('DOMContentLoaded', initGame); 
\ No newline at end of file
+document.addEventListener('DOMContentLoaded', initGame);
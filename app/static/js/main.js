@@ -45,14 +45,5 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
     
-    // Auto-update game page if it's in progress
-    var gameStatusElement = document.querySelector('#game-status');
-    if (gameStatusElement && gameStatusElement.dataset.status === 'in_progress') {
-        // Refresh page every 10 seconds if game is in progress and not user's turn
-        if (!gameStatusElement.dataset.canPlay || gameStatusElement.dataset.canPlay === 'false') {
-            setInterval(function() {
-                window.location.reload();
-            }, 10000);
-        }
-    }
+    // Game pages receive live updates over WebSocket (see game.js)
 }); 
\ No newline at end of file
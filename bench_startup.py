@@ -0,0 +1,100 @@
+"""Worker startup benchmark with a time budget: ``python bench_startup.py``.
+
+Every run is a fresh interpreter that imports the application (asgi:app)
+and runs its lifespan startup, as each worker does, against a database
+set up beforehand by the init command. The script exits with status 1 when
+the median import or startup time is over budget, or when a module that
+should only load on first use (LAZY_MODULES) was imported.
+
+Uses a throwaway SQLite database unless DATABASE_URL is set.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# Median seconds allowed for `import asgi` and for the lifespan startup
+STARTUP_IMPORT_BUDGET = float(os.getenv("STARTUP_IMPORT_BUDGET", "1.5"))
+STARTUP_LIFESPAN_BUDGET = float(os.getenv("STARTUP_LIFESPAN_BUDGET", "0.2"))
+
+# Imported on first use (password hashing, tokens), never at startup
+LAZY_MODULES = ("passlib", "jose", "cryptography")
+
+WORKER = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+from asgi import app
+imported = time.perf_counter()
+async def main():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+    return ready
+ready = asyncio.run(main())
+print(json.dumps({
+    "import": imported - started,
+    "startup": ready - imported,
+    "modules": [name for name in %r if name in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def run_worker(env: dict) -> dict:
+    """Time one simulated worker start in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", WORKER], cwd=BASE_DIR, env=env,
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure application import and startup time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget", type=float, default=STARTUP_IMPORT_BUDGET)
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_LIFESPAN_BUDGET)
+    parser.add_argument("--init-on-startup", action="store_true",
+                        help="let every worker set up the schema (DB_INIT_ON_STARTUP=1)")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ, DB_INIT_ON_STARTUP="1" if args.init_on_startup else "0")
+    tmp_dir = None
+    if "DATABASE_URL" not in env:
+        tmp_dir = tempfile.TemporaryDirectory()
+        env["DATABASE_URL"] = f"sqlite:///{tmp_dir.name}/bench.db"
+    try:
+        # The init command, once, as a deploy would run it
+        subprocess.run(
+            [sys.executable, "-m", "app.database.init_db"], cwd=BASE_DIR, env=env,
+            capture_output=True, check=True
+        )
+        runs = [run_worker(env) for _ in range(args.runs)]
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+    import_time = statistics.median(run["import"] for run in runs)
+    startup_time = statistics.median(run["startup"] for run in runs)
+    eager = sorted({name for run in runs for name in run["modules"]})
+    print(f"import   median {import_time:.3f}s  max {max(run['import'] for run in runs):.3f}s  budget {args.import_budget:.3f}s")
+    print(f"startup  median {startup_time:.3f}s  max {max(run['startup'] for run in runs):.3f}s  budget {args.startup_budget:.3f}s")
+
+    failures = []
+    if import_time > args.import_budget:
+        failures.append("import time over budget")
+    if startup_time > args.startup_budget:
+        failures.append("startup time over budget")
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
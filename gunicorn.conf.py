@@ -0,0 +1,22 @@
+"""gunicorn settings: ``gunicorn -c gunicorn.conf.py asgi:app``.
+
+The master imports the application once (preload_app) and sets up the
+database (schema, migrations, demo data) before forking, so workers start
+with DB_INIT_ON_STARTUP=0 and go straight to serving.
+"""
+import os
+
+os.environ.setdefault("DB_INIT_ON_STARTUP", "0")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def on_starting(server):
+    from app.database.init_db import init_db
+    from app.database.db import engine
+    init_db()
+    # Connections opened here must not be shared with the forked workers
+    engine.dispose()
@@ -1,21 +1,50 @@
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routers import auth, users, games, web, api
-from app.database.db import Base, engine, init_db
+from app.routers import auth, users, games, web, api, stats, ws, leaderboard
+from app.database.db import engine, env_flag, init_db, describe_engine
+from app.controllers.bot_scheduler import bot_scheduler
+from app.controllers.game_watcher import game_watcher
+from app.controllers.password_hasher import password_hasher
+from app.engine.mcts import warm_pool
 
-# Create tables in the database
-Base.metadata.create_all(bind=engine)
+# Create and migrate the schema when the app starts. With several workers
+# set this to 0 and set the schema up once instead: python -m
+# app.database.init_db before starting them, or gunicorn.conf.py, which
+# does it in the master process before forking
+DB_INIT_ON_STARTUP = env_flag("DB_INIT_ON_STARTUP", True)
+
+# Start the expert bot's MCTS worker processes with the app rather than on
+# the first expert move, whose time budget a cold pool can use up
+MCTS_PREWARM = env_flag("MCTS_PREWARM", True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DB_INIT_ON_STARTUP:
+        init_db()
+    print(f"Database: {describe_engine(engine)}")
+    # Background workers for bot replies
+    bot_scheduler.start()
+    if MCTS_PREWARM:
+        warm_pool()
+    # Moves made by other worker processes, for live updates and long-polls
+    game_watcher.start()
+    yield
+    await game_watcher.stop()
+    await bot_scheduler.stop()
+    password_hasher.shutdown()
 
 # Create FastAPI app
 app = FastAPI(
     title="Крестики-нолики API",
     description="API для веб-приложения Крестики-нолики (Tic-Tac-Toe)",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add middleware
@@ -25,6 +54,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # Mount static files
@@ -34,13 +64,13 @@ app.mount("/static", StaticFiles(directory=os.path.join(Path(__file__).parent, "
 app.include_router(auth.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
 app.include_router(games.router, prefix="/api")
+app.include_router(stats.router, prefix="/api")
+app.include_router(leaderboard.router, prefix="/api")
 
 # Include web routers
 app.include_router(web.router)
 app.include_router(api.router)
-
-# Initialize database
-init_db()
+app.include_router(ws.router)
 
 # Redirect root to API docs
 @app.get("/docs", include_in_schema=False)
@@ -0,0 +1,68 @@
+import itertools
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Settings are read at import time, so point them at throwaway locations
+# before anything from app is imported
+_tmp = tempfile.mkdtemp(prefix="tictactoe-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/test.db"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["ARCHIVE_DIR"] = os.path.join(_tmp, "archive")
+os.environ["SOLVED_TABLES_DIR"] = os.path.join(_tmp, "solved")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# The MCTS tests start their own pool when they need one
+os.environ["MCTS_PREWARM"] = "0"
+
+# Add the repository root to sys.path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+_usernames = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Test client for the app; its lifespan creates the schema"""
+    from fastapi.testclient import TestClient
+    import main
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(client):
+    from app.database.db import SessionLocal
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    """Create a user; returns (user id, bearer headers)"""
+    from app.models.models import User
+    from app.controllers.auth import create_access_token
+
+    def make_user():
+        name = f"user{next(_usernames)}"
+        user = User(username=name, email=f"{name}@example.com", hashed_password="-", is_active=True)
+        db.add(user)
+        db.commit()
+        return user.id, {"Authorization": f"Bearer {create_access_token({'sub': name})}"}
+    return make_user
+
+
+@pytest.fixture
+def new_game(client, make_user):
+    """Create a 3x3 game joined by a second user; returns its id and
+    (user id, bearer headers) of players X and O"""
+
+    def new_game():
+        x_player, o_player = make_user(), make_user()
+        game = client.post("/api/games/", json={"board_size": 3, "win_length": 3}, headers=x_player[1]).json()
+        assert client.post(f"/api/games/{game['id']}/join", headers=o_player[1]).status_code == 200
+        return game["id"], x_player, o_player
+    return new_game
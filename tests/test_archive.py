@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database.archive import ArchivedGame, ArchiveSegment, archive_games, write_segment
+from app.models.models import Game, GameStatus
+
+# Game rows archive_games picks up: finished and not updated for a day
+LONG_AGO = datetime(2024, 3, 1, 8, 18, 26)
+
+
+def add_game(db, x_id, o_id, status, created_at=LONG_AGO) -> int:
+    game = Game(
+        player_x_id=x_id, player_o_id=o_id, status=status, board_size=3, win_length=3,
+        move_count=0, created_at=created_at, updated_at=created_at
+    )
+    db.add(game)
+    db.commit()
+    return game.id
+
+
+def page_through(client, headers, path, limit):
+    """Ids of every game listed by following X-Next-Cursor"""
+    ids, cursor = [], None
+    for _ in range(20):
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get(path, params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        ids += [game["id"] for game in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return ids
+    pytest.fail(f"paging did not end: {ids}")
+
+
+@pytest.mark.parametrize("path", ["/api/games/summary", "/api/games/"])
+def test_paging_through_archived_and_live_games_ends(client, make_user, db, path):
+    x_id, x_headers = make_user()
+    o_id, _ = make_user()
+    older_id = add_game(db, x_id, o_id, GameStatus.DRAW.value, created_at=datetime(2024, 2, 1))
+    archived_id = add_game(db, x_id, o_id, GameStatus.X_WON.value)
+    # Started in the same second as the archived game, and still live
+    live_id = add_game(db, x_id, o_id, GameStatus.IN_PROGRESS.value)
+    archive_games(db, days=1)
+    expected = [live_id, archived_id, older_id]
+    for limit in (1, 2, 3):
+        assert page_through(client, x_headers, path, limit) == expected
+
+
+def test_segment_player_rows_start_at_the_cursor(tmp_path):
+    # Three games per second, so ties on created_at are broken by id
+    games = [
+        ArchivedGame(
+            id=game_id, player_x_id=1, player_o_id=2 if game_id % 2 else 3, status=GameStatus.DRAW.value,
+            winner_id=None, is_bot_game=False, bot_difficulty=None, board_size=3, win_length=3,
+            move_count=0, move_log=b"", created_at=LONG_AGO + timedelta(seconds=game_id // 3),
+            updated_at=LONG_AGO,
+        )
+        for game_id in range(1, 31)
+    ]
+    write_segment(tmp_path / "segment-000001.bin", games)
+    segment = ArchiveSegment(tmp_path / "segment-000001.bin")
+    for user_id in (1, 2, 3):
+        newest_first = sorted(
+            (game for game in games if user_id in (game.player_x_id, game.player_o_id)),
+            key=lambda game: (game.created_at, game.id), reverse=True
+        )
+        assert [segment.ids[row] for row in segment.player_rows(user_id)] == [game.id for game in newest_first]
+        for cursor in games + [games[4]._replace(id=100), games[4]._replace(id=0)]:
+            before = (cursor.created_at, cursor.id)
+            expected = [game.id for game in newest_first if (game.created_at, game.id) < before]
+            assert [segment.ids[row] for row in segment.player_rows(user_id, before)] == expected
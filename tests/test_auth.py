@@ -0,0 +1,26 @@
+import time
+
+from sqlalchemy import update
+
+from app.controllers import auth
+from app.models.models import User
+
+
+def test_deactivation_is_immediate_in_this_process(client, make_user):
+    user_id, headers = make_user()
+    _, admin_headers = make_user()
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+    assert client.put(f"/api/users/{user_id}/deactivate", headers=admin_headers).status_code == 200
+    assert client.get("/api/users/me", headers=headers).status_code == 400
+
+
+def test_deactivation_by_another_worker_is_seen_within_the_ttl(client, make_user, db, monkeypatch):
+    monkeypatch.setattr(auth, "TOKEN_CACHE_TTL", 0.2)
+    user_id, headers = make_user()
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+    # Another worker process deactivates the user: this one's cache is not told
+    db.execute(update(User).where(User.id == user_id).values(is_active=False))
+    db.commit()
+    time.sleep(0.3)
+    assert client.get("/api/users/me", headers=headers).status_code == 400
+
@@ -0,0 +1,43 @@
+from sqlalchemy import create_engine, text
+
+from app.controllers import bot_controller
+from app.controllers.bot_controller import TicTacToeBot
+from app.database.migrations import add_game_snapshot_columns
+from app.engine.bitboard import Bitboard, X
+from app.models.models import Game
+
+
+def test_games_without_difficulty_keep_the_heuristic_bot(monkeypatch):
+    def no_search(*args, **kwargs):
+        raise AssertionError("searched for a game without a difficulty")
+
+    monkeypatch.setattr(bot_controller, "AlphaBetaSearch", no_search)
+    monkeypatch.setattr(bot_controller, "MCTSSearch", no_search)
+    game = Game(id=1, board_size=3, win_length=3, is_bot_game=True, bot_difficulty=None)
+    bot = TicTacToeBot(None, game.id, bot_user_id=2, game=game)
+    board = Bitboard(3, 3)
+    board.play(0, 0, X)
+    assert bot.difficulty == "easy"
+    assert bot.quick_move(board) == (1, 1)
+
+
+def test_snapshot_migration_keeps_old_bot_games_on_the_heuristic_bot(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/old.db")
+    with engine.begin() as connection:
+        # games and moves as they were before the snapshot columns
+        connection.exec_driver_sql(
+            "CREATE TABLE games (id INTEGER PRIMARY KEY, player_x_id INTEGER, player_o_id INTEGER,"
+            " status VARCHAR(20), winner_id INTEGER, is_bot_game BOOLEAN, board_size INTEGER,"
+            " win_length INTEGER, created_at DATETIME, updated_at DATETIME)"
+        )
+        connection.exec_driver_sql(
+            "CREATE TABLE moves (id INTEGER PRIMARY KEY, game_id INTEGER, user_id INTEGER, row INTEGER,"
+            " col INTEGER, symbol VARCHAR(1), move_number INTEGER, created_at DATETIME)"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO games (id, is_bot_game, board_size, win_length, status) VALUES"
+            " (1, 1, 3, 3, 'in_progress'), (2, 0, 3, 3, 'in_progress')"
+        )
+        add_game_snapshot_columns(connection)
+        difficulties = dict(connection.execute(text("SELECT id, bot_difficulty FROM games")).all())
+    assert difficulties[1] == "easy"
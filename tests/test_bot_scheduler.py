@@ -0,0 +1,76 @@
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.controllers import bot_scheduler as scheduler_module
+from app.controllers.bot_scheduler import BotMoveScheduler
+from app.controllers.game_controller import create_bot_game
+from app.models.models import Game, GameStatus
+
+
+def test_failed_job_is_retried_once(client, monkeypatch):
+    attempts = []
+
+    def flaky_job(job):
+        attempts.append(job.attempts)
+        return "failed"
+
+    monkeypatch.setattr(scheduler_module, "_run_job", flaky_job)
+    scheduler = BotMoveScheduler(workers=1)
+
+    async def run():
+        scheduler.schedule(1, 1)
+        await scheduler._queue.join()
+        await scheduler.stop()
+
+    client.portal.call(run)
+    assert attempts == [0, 1]
+    assert (scheduler.failed, scheduler.retried) == (2, 1)
+
+
+def stuck_game(waiting: timedelta) -> Game:
+    return Game(
+        id=1, is_bot_game=True, status=GameStatus.IN_PROGRESS.value, current_player="O", move_count=1,
+        updated_at=datetime.utcnow() - waiting
+    )
+
+
+def test_resume_schedules_only_stalled_games_without_a_job(client, monkeypatch):
+    monkeypatch.setattr(scheduler_module, "_run_job", lambda job: "stale")
+    scheduler = BotMoveScheduler(workers=1)
+
+    async def run():
+        try:
+            return [
+                scheduler.resume(stuck_game(timedelta(seconds=1))),
+                scheduler.resume(stuck_game(timedelta(minutes=5))),
+                # Already queued
+                scheduler.resume(stuck_game(timedelta(minutes=5))),
+            ]
+        finally:
+            await scheduler.stop()
+
+    assert client.portal.call(run) == [False, True, False]
+
+
+def test_game_page_resumes_a_stuck_bot_game(client, make_user, db):
+    x_id, x_headers = make_user()
+    game_id = create_bot_game(db, x_id, bot_difficulty="easy").id
+    # A move made without queueing the reply, as if the job had been lost
+    assert client.post(f"/api/games/{game_id}/moves", json={"row": 0, "col": 0}, headers=x_headers).status_code == 200
+    db.execute(update(Game).where(Game.id == game_id).values(updated_at=datetime.utcnow() - timedelta(minutes=5)))
+    db.commit()
+
+    client.cookies.set("access_token", x_headers["Authorization"].removeprefix("Bearer "))
+    try:
+        assert client.get(f"/games/{game_id}").status_code == 200
+    finally:
+        client.cookies.clear()
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        board = client.get(f"/api/games/{game_id}/board", headers=x_headers).json()
+        if board["current_player"] == "X":
+            break
+        time.sleep(0.1)
+    assert sum(cell is not None for row in board["board"] for cell in row) == 2
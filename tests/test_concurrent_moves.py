@@ -0,0 +1,62 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.controllers import async_game_controller
+from app.database.db import AsyncSessionLocal
+from app.models.models import Move
+
+# Requests racing for each move
+RACERS = 8
+# The first moves of a 3x3 game that nobody wins: X, O, X, O
+MOVES = [(0, 0), (1, 1), (0, 1), (0, 2)]
+
+
+def move_numbers(db, game_id):
+    """Move rows per move number"""
+    return dict(db.execute(
+        select(Move.move_number, func.count()).where(Move.game_id == game_id).group_by(Move.move_number)
+    ).all())
+
+
+def test_parallel_requests_commit_each_move_once(client, new_game, db):
+    game_id, x_player, o_player = new_game()
+    for number, (row, col) in enumerate(MOVES, start=1):
+        _, headers = x_player if number % 2 else o_player
+        start = threading.Barrier(RACERS)
+
+        def post():
+            start.wait()
+            return client.post(f"/api/games/{game_id}/moves", json={"row": row, "col": col}, headers=headers)
+
+        with ThreadPoolExecutor(max_workers=RACERS) as pool:
+            codes = [response.status_code for response in pool.map(lambda _: post(), range(RACERS))]
+        assert codes.count(200) == 1, codes
+        # The losers either lost the commit race or saw the cell taken
+        assert set(codes) <= {200, 400, 409}, codes
+    assert move_numbers(db, game_id) == {number: 1 for number in range(1, len(MOVES) + 1)}
+
+
+def test_parallel_tasks_commit_each_move_once(client, new_game, db):
+    game_id, x_player, o_player = new_game()
+
+    async def move(user_id, row, col):
+        async with AsyncSessionLocal() as session:
+            try:
+                await async_game_controller.make_move(session, game_id, user_id, row, col)
+                return 200
+            except HTTPException as e:
+                return e.status_code
+
+    async def race(user_id, row, col):
+        return await asyncio.gather(*(move(user_id, row, col) for _ in range(RACERS)))
+
+    for number, (row, col) in enumerate(MOVES, start=1):
+        user_id, _ = x_player if number % 2 else o_player
+        codes = client.portal.call(race, user_id, row, col)
+        assert codes.count(200) == 1, codes
+        assert set(codes) <= {200, 400, 409}, codes
+    assert move_numbers(db, game_id) == {number: 1 for number in range(1, len(MOVES) + 1)}
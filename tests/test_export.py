@@ -0,0 +1,45 @@
+import json
+from datetime import datetime
+
+from app.database.archive import archive_games
+from app.models.models import Game, GameStatus, User
+
+LONG_AGO = datetime(2024, 3, 1, 8, 18, 26)
+
+
+def exported_ids(client, headers, **params) -> list:
+    response = client.get("/api/games/export", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return [json.loads(line)["id"] for line in response.text.splitlines()]
+
+
+def test_export_includes_archived_games(client, make_user, db):
+    x_id, x_headers = make_user()
+    o_id, _ = make_user()
+    archived = Game(
+        player_x_id=x_id, player_o_id=o_id, status=GameStatus.DRAW.value, board_size=3, win_length=3,
+        move_count=0, created_at=LONG_AGO, updated_at=LONG_AGO
+    )
+    db.add(archived)
+    db.commit()
+    archived_id = archived.id
+    live_id = client.post("/api/games/", json={"board_size": 3, "win_length": 3}, headers=x_headers).json()["id"]
+    archive_games(db, days=1)
+    assert db.get(Game, archived_id) is None
+    assert exported_ids(client, x_headers) == [archived_id, live_id]
+    assert exported_ids(client, x_headers, status=GameStatus.DRAW.value) == [archived_id]
+    assert exported_ids(client, x_headers, since="2025-01-01T00:00:00") == [live_id]
+
+
+def test_export_is_limited_to_own_games_unless_admin(client, make_user, db, monkeypatch):
+    x_id, x_headers = make_user()
+    other_id, other_headers = make_user()
+    game_id = client.post("/api/games/", json={"board_size": 3, "win_length": 3}, headers=x_headers).json()["id"]
+    other_game_id = client.post("/api/games/", json={"board_size": 3, "win_length": 3}, headers=other_headers).json()["id"]
+
+    assert client.get("/api/games/export", params={"user_id": other_id}, headers=x_headers).status_code == 403
+    assert exported_ids(client, x_headers) == [game_id]
+
+    monkeypatch.setattr("app.controllers.auth.ADMIN_USERNAMES", frozenset({db.get(User, x_id).username}))
+    assert exported_ids(client, x_headers, user_id=other_id) == [other_game_id]
+    assert {game_id, other_game_id} <= set(exported_ids(client, x_headers))
@@ -0,0 +1,28 @@
+import pytest
+from sqlalchemy import update
+
+from app.models.models import Game, GameStatus
+
+
+@pytest.mark.parametrize("path", ["/api/games/{id}", "/api/games/summary", "/api/games/"])
+def test_games_without_bot_difficulty_are_listed(client, make_user, db, path):
+    x_id, x_headers = make_user()
+    # A row from before the bot_difficulty column
+    game = Game(player_x_id=x_id, status=GameStatus.IN_PROGRESS.value)
+    db.add(game)
+    db.commit()
+    db.execute(update(Game).where(Game.id == game.id).values(bot_difficulty=None))
+    db.commit()
+    response = client.get(path.format(id=game.id), headers=x_headers)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    listed = body if isinstance(body, dict) else body[0]
+    assert listed["id"] == game.id
+    assert listed["bot_difficulty"] is None
+
+
+def test_bot_difficulty_is_not_a_create_option(client, make_user):
+    _, x_headers = make_user()
+    response = client.post("/api/games/", json={"bot_difficulty": "expert"}, headers=x_headers)
+    assert response.status_code == 200
+    assert response.json()["bot_difficulty"] != "expert"
@@ -0,0 +1,44 @@
+from sqlalchemy import text
+
+from app.controllers.stats_controller import backfill_user_stats
+from app.models.models import Game, GameStatus, UserStats
+
+
+def test_imported_timestamps_are_stored_like_native_ones(client, make_user, db):
+    x_id, x_headers = make_user()
+    o_id, _ = make_user()
+    response = client.post("/api/games/import", headers=x_headers, json={"games": [{
+        "player_x_id": x_id, "player_o_id": o_id, "moves": "b2 a1",
+        "created_at": "2024-05-01T12:30:45.123456+03:00",
+    }]})
+    assert response.status_code == 200, response.text
+    game_id = response.json()["game_ids"][0]
+    stored = db.execute(text("SELECT created_at, updated_at FROM games WHERE id = :id"), {"id": game_id}).one()
+    assert tuple(stored) == ("2024-05-01 09:30:45", "2024-05-01 09:30:45")
+    move_times = db.execute(text("SELECT DISTINCT created_at FROM moves WHERE game_id = :id"), {"id": game_id}).scalars().all()
+    assert move_times in ([], ["2024-05-01 09:30:45"])
+    # Same text format as a game stamped by CURRENT_TIMESTAMP
+    native_id = client.post("/api/games/", json={"board_size": 3, "win_length": 3}, headers=x_headers).json()["id"]
+    native = db.execute(text("SELECT created_at FROM games WHERE id = :id"), {"id": native_id}).scalar()
+    assert len(native) == len(stored[0])
+
+
+def test_import_cannot_change_another_users_rating(client, make_user, db):
+    x_id, x_headers = make_user()
+    o_id, _ = make_user()
+    db.add(UserStats(user_id=o_id, games=1, rating=1400))
+    db.commit()
+    response = client.post("/api/games/import", headers=x_headers, json={"games": [
+        {"player_x_id": x_id, "player_o_id": o_id, "moves": "a1 b1 a2 b2 a3"},
+    ]})
+    assert response.status_code == 200, response.text
+    game_id = response.json()["game_ids"][0]
+    db.expire_all()
+    assert db.get(Game, game_id).status == GameStatus.X_WON.value
+    assert db.get(UserStats, x_id) is None
+    assert (db.get(UserStats, o_id).games, db.get(UserStats, o_id).rating) == (1, 1400)
+    # Nor when the stats are rebuilt from the games
+    backfill_user_stats(db)
+    db.commit()
+    assert db.get(UserStats, x_id) is None
+    assert db.get(UserStats, o_id) is None
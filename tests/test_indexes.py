@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.controllers.async_game_controller import open_games_statement
+from app.controllers.game_controller import encode_cursor, user_games_statement
+from app.database.db import engine
+from app.models.models import Game
+
+
+def query_plan(stmt) -> dict:
+    """SQLite's EXPLAIN QUERY PLAN of a statement: step details by parent step"""
+    compiled = stmt.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    details = {row[0]: row[3] for row in rows}
+    steps = {}
+    for step_id, parent, _, detail in rows:
+        steps.setdefault(details.get(parent), []).append(detail)
+    return steps
+
+
+def branch_plans(steps: dict) -> list:
+    """Steps inside each UNION ALL branch, in order"""
+    return [children for parent, children in steps.items() if parent and parent.startswith("CO-ROUTINE")]
+
+
+def test_user_games_branches_use_player_indexes(client):
+    _, stmt = user_games_statement(user_id=1, limit=20)
+    # Each branch reads its index in order: no scan, no sort of the history
+    assert sorted(branch_plans(query_plan(stmt))) == [
+        ["SEARCH games USING INDEX ix_games_player_o_created (player_o_id=?)"],
+        ["SEARCH games USING INDEX ix_games_player_x_created (player_x_id=?)"],
+    ]
+
+
+def test_user_games_after_cursor_use_player_indexes(client):
+    cursor = encode_cursor(Game(id=1, created_at=datetime(2024, 1, 1)))
+    _, stmt = user_games_statement(user_id=1, limit=20, cursor=cursor)
+    branches = sorted(branch_plans(query_plan(stmt)))
+    assert len(branches) == 2
+    for branch, column in zip(branches, ("player_o_id", "player_x_id")):
+        # The cursor's game is looked up by primary key; the branch itself
+        # seeks into its index past the cursor
+        assert f"SEARCH games USING INDEX ix_games_{column[:8]}_created ({column}=? AND " in branch[0]
+        assert not any("TEMP B-TREE" in step for step in branch)
+
+
+def test_lobby_uses_open_games_index(client):
+    steps = query_plan(open_games_statement(user_id=1))
+    assert steps[None] == ["SEARCH games USING INDEX ix_games_open (status=?)"]
@@ -0,0 +1,24 @@
+from app.controllers.leaderboard import Leaderboard
+from app.models.models import User, UserStats
+
+
+def rated_user(db, name: str, rating: float, is_bot: bool = False) -> int:
+    user = User(username=name, email=f"{name}@example.com", hashed_password="-", is_bot=is_bot)
+    db.add(user)
+    db.flush()
+    db.add(UserStats(user_id=user.id, games=1, rating=rating))
+    db.commit()
+    return user.id
+
+
+def test_bot_ratings_stay_off_the_board(client, db):
+    board = Leaderboard(sync_interval=3600)
+    player_id = rated_user(db, "leaderboard_player", 1250)
+    bot_id = rated_user(db, "leaderboard_bot", 1300, is_bot=True)
+    board.sync(db, force=True)
+    # A finished bot game pushes both players' new ratings
+    board.update(player_id, 1260, 2)
+    board.update(bot_id, 1290, 2)
+    assert bot_id not in [entry["user_id"] for entry in board.top(100)]
+    assert board.stats()["pending_lookups"] == 0
+    assert board.rank_of(player_id)["rating"] == 1260
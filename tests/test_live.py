@@ -0,0 +1,98 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import app.routers.ws as ws
+from app.cache.lru import LRUCache
+from app.controllers import async_game_controller, game_controller
+from app.controllers.game_hub import GameHub, game_hub
+from app.database.db import AsyncSessionLocal, SessionLocal
+
+
+def test_socket_gets_moves_committed_while_reading_state(client, new_game, monkeypatch):
+    game_id, (_, x_headers), _ = new_game()
+    read_state = ws.get_cached_board
+
+    async def read_state_then_move(db, game_id, game=None):
+        state = await read_state(db, game_id, game)
+        # A move committed by another request right after the state was read
+        game_hub.publish(game_id, {"type": "move", "row": 0, "col": 0, "move_number": 1})
+        return state
+
+    monkeypatch.setattr(ws, "get_cached_board", read_state_then_move)
+    client.cookies.set("access_token", x_headers["Authorization"].removeprefix("Bearer "))
+    try:
+        with client.websocket_connect(f"/ws/games/{game_id}") as socket:
+            assert socket.receive_json()["type"] == "state"
+            assert socket.receive_json()["move_number"] == 1
+    finally:
+        client.cookies.clear()
+
+
+def move_elsewhere(client, monkeypatch, game_id, headers, row, col):
+    """Make a move the way another worker process would: with its own hub
+    and board cache, so nothing in this process hears about it"""
+    with monkeypatch.context() as patch:
+        patch.setattr(game_controller, "game_hub", GameHub())
+        patch.setattr(game_controller, "board_cache", LRUCache(maxsize=16, ttl=60))
+        response = client.post(f"/api/games/{game_id}/moves", json={"row": row, "col": col}, headers=headers)
+        assert response.status_code == 200
+
+
+def test_socket_hears_moves_from_other_workers(client, new_game, monkeypatch):
+    game_id, (_, x_headers), (_, o_headers) = new_game()
+    client.cookies.set("access_token", o_headers["Authorization"].removeprefix("Bearer "))
+    try:
+        with client.websocket_connect(f"/ws/games/{game_id}") as socket:
+            assert socket.receive_json()["move_count"] == 0
+            move_elsewhere(client, monkeypatch, game_id, x_headers, 1, 1)
+            # The game watcher notices within its interval
+            assert socket.receive_json() == {"type": "resync"}
+    finally:
+        client.cookies.clear()
+
+
+def test_long_poll_wakes_on_moves_from_other_workers(client, new_game, monkeypatch):
+    game_id, (_, x_headers), _ = new_game()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        started = time.monotonic()
+        poll = pool.submit(
+            client.get, f"/api/games/{game_id}/board",
+            params={"wait_for_move_after": 0, "timeout": 20}, headers=x_headers
+        )
+        time.sleep(0.3)
+        move_elsewhere(client, monkeypatch, game_id, x_headers, 0, 0)
+        response = poll.result()
+    assert response.status_code == 200
+    assert response.json()["board"][0][0] == "X"
+    assert time.monotonic() - started < 10
+
+
+def test_board_etag_follows_moves_from_other_workers(client, new_game, monkeypatch):
+    game_id, (_, x_headers), _ = new_game()
+    first = client.get(f"/api/games/{game_id}/board", headers=x_headers)
+    etag = first.headers["ETag"]
+    move_elsewhere(client, monkeypatch, game_id, x_headers, 2, 2)
+    # This process's cache still holds the empty board
+    response = client.get(f"/api/games/{game_id}/board", headers={**x_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["board"][2][2] == "X"
+
+
+def test_board_of_a_loaded_game_follows_moves_from_other_workers(client, new_game, monkeypatch):
+    game_id, (_, x_headers), _ = new_game()
+    # Warm this process's board cache with the empty board
+    assert client.get(f"/api/games/{game_id}/board", headers=x_headers).status_code == 200
+    move_elsewhere(client, monkeypatch, game_id, x_headers, 1, 1)
+
+    async def game_page_board():
+        async with AsyncSessionLocal() as session:
+            game = await async_game_controller.get_game(session, game_id)
+            return await async_game_controller.get_game_with_board(session, game_id, game)
+
+    board = client.portal.call(game_page_board)
+    assert board.board[1][1] == "X"
+    assert board.current_player == "O"
+    with SessionLocal() as session:
+        game = game_controller.get_game(session, game_id)
+        assert game_controller.get_game_with_board(session, game_id, game).board[1][1] == "X"
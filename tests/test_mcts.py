@@ -0,0 +1,38 @@
+from concurrent.futures import Future
+
+from app.engine import mcts
+from app.engine.bitboard import Bitboard, O, X
+from app.engine.mcts import MCTSSearch
+
+
+class StartingPool:
+    """A pool whose workers never get to answer"""
+
+    def submit(self, *args):
+        return Future()
+
+
+def test_search_falls_back_to_in_process_playouts(monkeypatch):
+    monkeypatch.setattr(mcts, "get_pool", lambda: StartingPool())
+    board = Bitboard(5, 4)
+    board.play(2, 2, X)
+    search = MCTSSearch(board, time_limit=0.2, workers=2)
+    move = search.best_move()
+    assert search.playouts > 0
+    assert board.is_legal(*move)
+
+
+def test_warm_pool_starts_every_worker(monkeypatch):
+    monkeypatch.setattr(mcts, "MCTS_WORKERS", 2)
+    try:
+        mcts.warm_pool().join(timeout=60)
+        pool = mcts.get_pool()
+        assert len(pool._processes) == 2
+        board = Bitboard(3, 3)
+        board.play(0, 0, X)
+        board.play(1, 1, O)
+        search = MCTSSearch(board, time_limit=0.2, workers=2)
+        search.best_move()
+        assert search.playouts > 0
+    finally:
+        mcts.shutdown_pool()
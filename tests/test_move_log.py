@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import update
+
+from app.controllers import async_game_controller, move_store
+from app.database.db import AsyncSessionLocal
+from app.engine import move_log
+from app.models.models import Game
+
+MOVES = [(4, 1_700_000_000), (0, 1_700_000_003), (8, 1_700_000_300), (2, 1_700_000_300)]
+
+
+def test_appended_log_matches_encoded_log():
+    log = b""
+    for cell, at in MOVES:
+        log = move_log.append(log, cell, at)
+    assert log == move_log.encode(MOVES)
+    assert move_log.decode(log) == MOVES
+
+
+def test_append_reads_only_the_header():
+    log = move_log.encode(MOVES)
+    # Moves before the header's last time are never decoded
+    garbled = log[:move_log.HEADER_SIZE] + b"\xff" * (len(log) - move_log.HEADER_SIZE - 1) + b"\x00"
+    appended = move_log.append(garbled, 5, MOVES[-1][1] + 7)
+    assert appended[move_log.HEADER_SIZE:].startswith(garbled[move_log.HEADER_SIZE:])
+    assert int.from_bytes(appended[:move_log.HEADER_SIZE], "big") == MOVES[-1][1] + 7
+
+
+@pytest.mark.parametrize("storage", ["rows", "packed"])
+def test_async_board_backfill_reads_the_game_store(client, new_game, db, monkeypatch, storage):
+    monkeypatch.setattr(move_store, "MOVE_STORAGE", storage)
+    game_id, (_, x_headers), (_, o_headers) = new_game()
+    for (row, col), headers in [((1, 1), x_headers), ((0, 2), o_headers)]:
+        assert client.post(f"/api/games/{game_id}/moves", json={"row": row, "col": col}, headers=headers).status_code == 200
+    # A game from before board snapshots
+    db.execute(update(Game).where(Game.id == game_id).values(board=None))
+    db.commit()
+
+    async def backfill():
+        async with AsyncSessionLocal() as session:
+            game = await session.get(Game, game_id)
+            assert (game.move_log is not None) == (storage == "packed")
+            return await async_game_controller.get_bitboard(session, game)
+
+    board = client.portal.call(backfill)
+    assert board.move_count == 2
+    assert board.get(1, 1) == "X" and board.get(0, 2) == "O"
@@ -0,0 +1,27 @@
+import pytest
+
+from app.engine.bitboard import Bitboard
+from app.engine.search import AlphaBetaSearch, MATE_THRESHOLD, line_weights
+
+
+@pytest.mark.parametrize("size, win_length", [(3, 3), (5, 5), (8, 6), (7, 7), (10, 10)])
+def test_long_lines_search(size, win_length):
+    board = Bitboard(size, win_length)
+    for row, col in [(0, 0), (1, 1), (0, 1), (1, 2), (0, 2)]:
+        board.play(row, col, board.current_player)
+    search = AlphaBetaSearch(board, time_budget=0.2, max_depth=2)
+    row, col = search.best_move()
+    assert board.is_legal(row, col)
+
+
+@pytest.mark.parametrize("win_length", range(3, 11))
+def test_line_weights_stay_below_win_scores(win_length):
+    weights = line_weights(win_length)
+    # Indexed by own stones in a line, plus one for the cell being scored
+    assert len(weights) == win_length + 1
+    assert weights[-1] <= 10000 < MATE_THRESHOLD
+    assert list(weights) == sorted(set(weights))
+
+
+def test_short_lines_keep_powers_of_ten():
+    assert line_weights(5) == (0, 1, 10, 100, 1000, 10000)